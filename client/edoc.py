@@ -1,5 +1,4 @@
-from random import randint
-from copy import deepcopy
+from random import randint, choice
 import argparse
 import os
 import logging
@@ -8,51 +7,90 @@ import time
 import math
 import unittest
 import sys
+import itertools
 import threading
+import queue
+import zlib
+import lzma
+import bz2
+from array import array
+import tempfile
+import json
+import io
+import ntpath
+import mmap
+from stat import S_ISREG
+from operator import itemgetter
+from collections import deque, Counter
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Tuple, List
 
+logger = logging.getLogger("edoc")
+
 class ReadBuffer:
 	"""
 	ReadBuffer buffers reading of files.
 		
 	Attributes:
+		name (string): path to file
 		fIn (file): filereference
 		bufferSize (int): size of the buffer
-		buffer (bytearray): buffer
+		buffer (bytearray): preallocated buffer, filled with readinto
+		view (memoryview): view of the buffer
 		bufferPos (int): startposition of the buffer in the open file
+		bufferLength (int): number of valid bytes in the buffer
 		pos (int): position of the cursor in the open file
-		filesize (int): size of the open file
+		filesize (int): size of the open file, sys.maxsize for pipes
+		map (mmap): mapping of the file, None for buffered reads
+		mapView (memoryview): view of the mapping
+		maxMapSize (int): files above this size are not mapped
 		
 	Parameters:
 		inFile (string): path to file
 		bufferSize (int): size of the buffer
+		useMmap (bool): map regular files into memory instead of buffering them
 		
 	| **Pre:**
-	|	os.path.isFile(inFile)
+	|	os.path.exists(inFile)
 	|	self.bufferSize > 0
 		
 	| **Post:**
 	|	self.fIn is open
-	|	len(self.buffer) >= 0
-	|	len(self.buffer) <= self.bufferSize
-	|	isinstance(self.buffer[i], int)
-	|	self.buffer[i] >= 0
-	|	self.buffer[i] < 256
+	|	len(self.buffer) == self.bufferSize
 	|	self.bufferPos == 0
 	|	self.pos == 0
-	|	self.filesize == os.stat(inFile).st_size
+		
+	Note:
+		read() returns views of the buffer or the mapping instead of copies,
+		they are only valid until the next call of read() or seek().
+		Pipes, empty files and files above maxMapSize fall back to buffered reads.
 	"""
-	def __init__(self, inFile, bufferSize=1024):
+	maxMapSize = (1<<40) if sys.maxsize > (1<<32) else (1<<30)
+
+	def __init__(self, inFile, bufferSize=1024*1024, useMmap=False):
+		self.name = inFile
 		self.fIn = open(inFile, "rb")
 		self.bufferSize = bufferSize
-		self.buffer = self.fIn.read(self.bufferSize)
+		self.buffer = bytearray(bufferSize)
+		self.view = memoryview(self.buffer)
 		self.bufferPos = 0
+		self.bufferLength = 0
 		self.pos = 0
-		self.filesize = os.stat(inFile).st_size
+		self.map = None
+		self.mapView = None
+		stat = os.fstat(self.fIn.fileno())
+		if (S_ISREG(stat.st_mode)):
+			self.filesize = stat.st_size
+			if (useMmap and self.filesize > 0 and self.filesize <= ReadBuffer.maxMapSize):
+				self.map = mmap.mmap(self.fIn.fileno(), 0, access=mmap.ACCESS_READ)
+				self.mapView = memoryview(self.map)
+		else:
+			self.filesize = sys.maxsize
 
 	def seek(self, pos):
 		"""
 		Changes the cursorposition within a file.
+		The buffer is kept if it contains pos.
 			
 		Parameters:
 			pos (int): position
@@ -63,61 +101,102 @@ class ReadBuffer:
 		|	self.fIn is open
 			
 		| **Post:**
-		|	self.bufferPos = pos
+		|	self.pos = pos
 			
 		| **Modifies:**
+		|	self.pos
 		|	self.bufferPos
-		|	self.buffer[i]
+		|	self.bufferLength
 		|	self.fIn
 		"""
-		self.bufferPos = pos
-		self.fIn.seek(pos)
-		self.buffer = self.fIn.read(self.bufferSize)
+		if (self.map is None and (pos < self.bufferPos or pos > self.bufferPos+self.bufferLength)):
+			self.bufferPos = pos
+			self.bufferLength = 0
+			self.fIn.seek(pos)
+		self.pos = pos
 
 	def read(self, size):
 		"""
-		Reads data from file into buffer.
+		Reads data from file.
 			
 		Parameters:
 			size (int): max number of bytes to be read
 		
 		Returns:
-			bytearray: read bytes
+			memoryview: read bytes
 			
 		| **Pre:**
-		|	size > 0
-		|	size <= self.bufferSize
+		|	size >= 0
 		|	self.fIn is open
 			
 		| **Post:**
 		|	len(return) >= 0
 		|	len(return) <= size
-		|	isinstance(return[i], int)
 		|	return[i] >= 0
 		|	return[i] < 256
 			
 		| **Modifies:**
 		|	self.bufferPos
+		|	self.bufferLength
 		|	self.buffer[i]
 		|	self.pos
 		|	self.fIn
 		"""
-		ba = bytearray()
-		if (self.pos+size > self.filesize):
-			size = self.filesize-self.pos
-		if (size == 0):
-			return ba
-		if (self.pos+size > self.bufferPos+self.bufferSize):
-			for i in range(self.bufferPos+self.bufferSize-self.pos):
-				ba.append(self.buffer[i+self.pos-self.bufferPos])
-			self.seek(self.bufferPos+self.bufferSize)#TODO ensure buffer contains all data (size<=bufferSize)
-			for i in range(self.pos+size-self.bufferPos):
-				ba.append(self.buffer[i])
-		else:
-			for i in range(size):
-				ba.append(self.buffer[i+self.pos-self.bufferPos])
-		self.pos = self.pos+size
-		return ba
+		size = max(0, min(size, self.filesize-self.pos))
+		if (self.map is not None):
+			self.pos += size
+			return self.mapView[self.pos-size:self.pos]
+		start = self.pos-self.bufferPos
+		available = self.bufferLength-start
+		if (size > available):
+			if (size > self.bufferSize):
+				data = bytearray(size)
+				data[:available] = self.view[start:self.bufferLength]
+				size = available+self.readFully(memoryview(data)[available:])
+				del data[size:]
+				self.pos += size
+				self.bufferPos = self.pos
+				self.bufferLength = 0
+				return memoryview(data)
+			self.view[:available] = self.view[start:self.bufferLength]
+			self.bufferPos = self.pos
+			self.bufferLength = available+self.readFully(self.view[available:])
+			size = min(size, self.bufferLength)
+			start = 0
+		self.pos += size
+		return self.view[start:start+size]
+
+	def tell(self):
+		"""
+		Gets the cursorposition within the file.
+		
+		Returns:
+			int: position
+		"""
+		return self.pos
+
+	def readFully(self, view):
+		"""
+		Reads from file until view is full or the end of the file is reached.
+			
+		Parameters:
+			view (memoryview): target
+		
+		Returns:
+			int: number of read bytes
+			
+		| **Modifies:**
+		|	view[i]
+		|	self.fIn
+		"""
+		length = 0
+		while (length < len(view)):
+			n = self.fIn.readinto(view[length:])
+			if (not n):
+				break
+			length += n
+		return length
+
 	def close(self):
 		"""
 		Closes the file.
@@ -131,74 +210,158 @@ class ReadBuffer:
 		| **Modifies:**
 		|	self.fIn
 		"""
+		self.view.release()
+		if (self.map is not None):
+			self.mapView.release()
+			try:
+				self.map.close()
+			except BufferError:
+				pass#views returned by read() are still alive, the mapping is closed once they are freed
 		self.fIn.close()
 
 class WriteBuffer:
 	"""
 	WriteBuffer buffers writing of files.
+	Buffered data is handed over as a whole once it reaches the high-water mark,
+	either directly to the file or to a background writer thread.
 		
 	Attributes:
 		fOut (file): filereference
-		bufferSize (int): size of the buffer
+		bufferSize (int): high-water mark of the buffer
 		buffer (bytearray): buffer
-		size (int): actual size of the buffer
+		bufferPos (int): startposition of the buffer in the open file
+		fsync (bool): whether close() and sync() force the data onto the disk
+		queue (Queue): bounded queue of (position, data) pairs, None without writer thread
+		writer (Thread): background writer thread, None without writer thread
+		error (BaseException): error raised inside the writer thread
 		
 	Parameters:
 		outFile (string): path to file
-		bufferSize (int): size of the buffer
+		bufferSize (int): high-water mark of the buffer
+		background (bool): whether a background thread writes the buffers
+		queueSize (int): maximum number of buffers waiting for the writer thread
+		fsync (bool): whether close() and sync() force the data onto the disk
 		
 	| **Pre:**
-	|	os.path.isFile(outFile)
 	|	self.bufferSize > 0
+	|	queueSize > 0
 		
 	| **Post:**
 	|	self.fOut is open
-	|	len(self.buffer) >= 0
-	|	len(self.buffer) <= self.bufferSize
-	|	isinstance(self.buffer[i], int)
-	|	self.buffer[i] >= 0
-	|	self.buffer[i] < 256
+	|	len(self.buffer) == 0
+	|	self.bufferPos == 0
 	|	folders above outFile are created
 	
 	Note:
-		self.size might be bigger sometimes than self.bufferSize
+		Buffers are written in the order they were handed over, so data written
+		after a seek() never overtakes data written before it.
 	"""
-	def __init__(self, outFile, bufferSize=1024):
+	def __init__(self, outFile, bufferSize=1024*1024, background=False, queueSize=4, fsync=False):
 		self.bufferSize = bufferSize
 		self.buffer = bytearray()
-		self.size = 0
+		self.bufferPos = 0
+		self.fsync = fsync
 		index = outFile.rfind("/")
 		if (index != -1):
-			folder = outFile[:index]
-			if (not os.path.exists(folder)):
-				os.makedirs(folder)
+			os.makedirs(outFile[:index], exist_ok=True)#worker processes may create the same folder concurrently
 		self.fOut = open(outFile, "wb")
+		self.queue = None
+		self.writer = None
+		self.error = None
+		if (background):
+			self.queue = queue.Queue(queueSize)
+			self.writer = threading.Thread(target=self.writeLoop, daemon=True)
+			self.writer.start()
 	def write(self, data):
 		"""
 		Writes data into buffer and file.
 			
 		Parameters:
-			data (bytearray): data to be written
+			data (bytes-like): data to be written
 			
 		| **Pre:**
-		|	self.fIn is open
-		|	len(data) > 0
-		|	isinstance(data[i], int)
-		|	data[i] >= 0
-		|	data[i] < 256
+		|	self.fOut is open
 			
 		| **Modifies:**
-		|	self.size
-		|	self.buffer[i]
+		|	self.buffer
+		|	self.fOut
+		"""
+		self.buffer += data
+		if (len(self.buffer) >= self.bufferSize):
+			self.flush()
+	def tell(self):
+		"""
+		Gets the cursorposition within the file.
+		
+		Returns:
+			int: position
+		"""
+		return self.bufferPos+len(self.buffer)
+	def flush(self):
+		"""
+		Hands the buffer over to the file or to the writer thread.
+			
+		| **Post:**
+		|	len(self.buffer) == 0
+			
+		| **Modifies:**
+		|	self.buffer
+		|	self.bufferPos
 		|	self.fOut
 		"""
-		for d in data:
-			self.buffer.append(d)
-		self.size += len(data)
-		if (self.size > self.bufferSize):
+		if (self.error is not None):
+			raise self.error
+		if (len(self.buffer) == 0):
+			return
+		if (self.queue is None):
 			self.fOut.write(self.buffer)
-			self.size = 0
+			self.bufferPos += len(self.buffer)
+			self.buffer.clear()
+		else:
+			self.queue.put((self.bufferPos, self.buffer))
+			self.bufferPos += len(self.buffer)
 			self.buffer = bytearray()
+	def writeLoop(self):
+		"""
+		Writes the queued buffers until None is queued.
+		Runs inside the writer thread.
+			
+		| **Modifies:**
+		|	self.fOut
+		|	self.error
+		"""
+		while (True):
+			item = self.queue.get()
+			try:
+				if (item is None):
+					return
+				if (self.error is None):
+					pos, data = item
+					if (self.fOut.tell() != pos):
+						self.fOut.seek(pos)
+					self.fOut.write(data)
+			except BaseException as e:
+				self.error = e
+			finally:
+				self.queue.task_done()
+	def sync(self):
+		"""
+		Waits until all written data reached the file.
+			
+		| **Post:**
+		|	all data written so far is in the file, on the disk if self.fsync
+			
+		| **Modifies:**
+		|	self.fOut
+		"""
+		self.flush()
+		if (self.queue is not None):
+			self.queue.join()
+			if (self.error is not None):
+				raise self.error
+		self.fOut.flush()
+		if (self.fsync):
+			os.fsync(self.fOut.fileno())
 	def close(self):
 		"""
 		Closes the file and flushes the buffer.
@@ -208,12 +371,19 @@ class WriteBuffer:
 			
 		| **Post:**
 		|	self.fOut is closed
+		|	the writer thread is stopped
 			
 		| **Modifies:**
 		|	self.fOut
 		"""
-		self.fOut.write(self.buffer)
-		self.fOut.close()
+		try:
+			self.sync()
+		finally:
+			if (self.writer is not None):
+				self.queue.put(None)
+				self.writer.join()
+				self.writer = None
+			self.fOut.close()
 	def seek(self, pos):
 		"""
 		Changes the cursorposition within a file and flushes buffer.
@@ -223,963 +393,2778 @@ class WriteBuffer:
 			
 		| **Pre:**
 		|	pos >= 0
-		|	self.fIn is open
+		|	self.fOut is open
 			
 		| **Post:**
 		|	self.buffer = bytearray()
+		|	self.tell() == pos
 			
 		| **Modifies:**
 		|	self.fOut
-		|	self.buffer[i]
+		|	self.buffer
 		"""
-		self.fOut.write(self.buffer)
-		self.buffer = bytearray()
-		self.fOut.seek(pos)#TODO preconditions
+		self.flush()
+		if (self.queue is None):
+			self.fOut.seek(pos)
+		self.bufferPos = pos
+def checkPath(root, name):
+	"""
+	Checks that a path read from an archive stays within the restored folder.
+	Names from an archive written on another system are rejected as well if they would only leave
+	the folder on Windows (backslashes, drives).
+	
+	Parameters:
+		root (string): path of the restored folder
+		name (string): path relative to the folder
+		
+	Returns:
+		string: path of the file within root
+		
+	Raises:
+		ValueError: the path is absolute, empty, has a drive, backslashes, ".." or empty parts or resolves outside of root
+	"""
+	parts = name.split("/")
+	if (".." in parts or "" in parts or "\\" in name or ntpath.splitdrive(name)[0] != "" or os.path.isabs(name)):
+		raise ValueError(name+" is no valid path")
+	path = root.rstrip("/")+"/"+name
+	root = os.path.abspath(root)
+	if (os.path.commonpath((root, os.path.abspath(path))) != root):
+		raise ValueError(name+" is no valid path")
+	return path
 class Archiver:
-	def __init__(self, folder, deleteOnCompletion=False):
+	"""
+	Archiver serializes a file or a folder into a stream of records.
+	Every file is stored as one record:
+	[2 bytes length of the path][utf-8 path relative to the folder][8 bytes size][data]
+		
+	Attributes:
+		folder (string): path to the archived folder
+		pending (deque): paths waiting to be archived, folders are expanded on demand
+		readBuffer (ReadBuffer): file being archived, None between files
+		file (string): path of the file being archived
+		remaining (int): number of bytes of the file, which are not archived yet
+		deleteOnCompletion (bool): whether archived files are removed
+		readSize (int): size of the chunks returned by read()
+		scanned (bool): whether self.pending holds files only
+		
+	Parameters:
+		folder (string): path to file or folder
+		deleteOnCompletion (bool): whether archived files are removed
+		readSize (int): size of the chunks returned by read()
+		manifest (list): files of the folder as returned by scanFolder, None to walk the folder on demand
+		
+	| **Pre:**
+	|	os.path.exists(folder)
+	|	readSize > 0
+	"""
+	def __init__(self, folder, deleteOnCompletion=False, readSize=1024*1024, manifest=None):
+		self.folder = folder.rstrip("/")
+		self.pending = deque()
+		self.scanned = manifest is not None
+		if (self.scanned):
+			self.pending.extend(name for name, size in manifest)
+		elif (os.path.isfile(self.folder)):
+			self.folder, name = os.path.split(self.folder)
+			self.pending.append(name)
+		else:
+			self.pending.extend(sorted(os.listdir(self.folder)))
 		self.readBuffer = None
-		self.files = []
-		if (os.path.isfile(file)):
-			self.files = [folder]
-		elif (os.path.isdir(file)):
-			files = os.listdir(folder)
-			for file in files:
-				file = folder + "/" + file
-				self.files.append(file)
 		self.file = ""
+		self.remaining = 0
 		self.deleteOnCompletion = deleteOnCompletion
-		self.readSize = 1024
-	def read():
-		ba = bytearray()
-		if (self.readBuffer is None):
-			while (True):
-				if (len(self.files) == 0):
+		self.readSize = readSize
+	def nextFile(self):
+		"""
+		Gets the next file to archive.
+		
+		Returns:
+			string: path relative to self.folder, None if all files are archived
+			
+		| **Modifies:**
+		|	self.pending
+		"""
+		while (len(self.pending) > 0):
+			name = self.pending.popleft()
+			if (self.scanned):
+				return name
+			path = os.path.join(self.folder, name)
+			if (os.path.isdir(path)):
+				self.pending.extendleft(reversed([name+"/"+child for child in sorted(os.listdir(path))]))
+			elif (os.path.isfile(path)):
+				return name
+		return None
+	def read(self):
+		"""
+		Reads the next chunk of the archive.
+		Small files are packed together, so chunks are only shorter than self.readSize at the end.
+		
+		Returns:
+			bytearray: next chunk, empty at the end of the archive
+			
+		Raises:
+			OSError: a file shrank while it was archived
+			
+		| **Modifies:**
+		|	self.pending
+		|	self.readBuffer
+		|	self.remaining
+		"""
+		chunk = bytearray()
+		while (len(chunk) < self.readSize):
+			if (self.readBuffer is None):
+				name = self.nextFile()
+				if (name is None):
 					break
-				else:
-					file = self.files.pop(0)
-					if (os.path.isdir(file)):
-						folder = file
-						files = os.listdir(folder)
-						for file in files:
-							file = folder + "/" + file
-							self.files.append(file)
-					elif (os.path.isfile(file)):
-						self.readBuffer = ReadBuffer(file)
-						self.file = file
-						length = len(file)
-						ba.append(length>>8)
-						ba.append(length&255)
-						for c in file:
-							ba.append(ord(c))
-						fileSize = os.stat(file).st_size
-						for i in range(8):
-							ba.append((fileSize >> (8*(8-1-i))) & 255)
-						break
-		else:
-			ba = self.readBuffer.read(self.readSize)
-			if (len(ba) == 0):
+				self.file = os.path.join(self.folder, name)
+				self.readBuffer = ReadBuffer(self.file, self.readSize)
+				self.remaining = self.readBuffer.filesize
+				path = name.encode("utf-8")
+				chunk += len(path).to_bytes(2, "big")
+				chunk += path
+				chunk += self.remaining.to_bytes(8, "big")
+			size = max(0, min(self.remaining, self.readSize-len(chunk)))
+			data = self.readBuffer.read(size)
+			if (len(data) < size):
+				raise OSError(self.file+" shrank while it was archived")
+			chunk += data
+			self.remaining -= size
+			if (self.remaining == 0):
 				self.readBuffer.close()
 				self.readBuffer = None
 				if (self.deleteOnCompletion):
 					os.remove(self.file)
-				ba = self.read()
-		return ba
-class Dearchiver:
-	def __init__(self, folder):
-		self.writeBuffer = None
-		self.filesize = 0
-		self.buffer = None
-		self.folder = folder
-	def write(data):
-		if (self.buffer is not None):
-			data = self.buffer+data
-			self.buffer = None
-		dataLength = len(data)
-		if (self.writeBuffer is None):
-			if (dataLength >= 2):
-				length = ((data[0])<<8) + data[1]
-				if (dataLength >= 2+length):
-					file = ""
-					for i in range(length):
-						file += chr(data[2+i])
-					self.filesize = 0
-					if (dataLength >= 2+length+8):
-						for i in range(8):
-							self.filesize += (data[2+length+i]) << (8*(8-1-i))
-							self.writeBuffer = WriteBuffer(self.folder+"/"+file)
-							length = min(dataLength-(2+length+8), self.filesize)
-							ba = bytearray()
-							for i in range(length):
-								ba.append(data[2+length+8+i])
-							self.writeBuffer.write(ba)
-							self.filesize -= length
-					else:
-						self.buffer = data
-				else:
-					self.buffer = data
-			else:
-				self.buffer = data
-		else:
-			length = min(dataLength, self.filesize)
-			ba = bytearray()
-			for i in range(length):
-				ba.append(data[i])
-			self.writeBuffer.write(ba)
-			self.filesize -= length
-			if (self.filesize == 0):
-				self.writeBuffer.close()
-				self.writeBuffer = None
-				self.write(data[length:])
-class Compressor:
-	def __init__(self):
-		self.dict = {}
-		for i in range(256):
-			self.dict[(i,)] = [-1, i]
-		self.size = 256
-		self.maxSize = 256*256
-		self.buffer = None
-	def compress(self, data):
-		bytes = ()
-		if (self.buffer is not None):
-			bytes = self.buffer
-			self.buffer = None
-		dataLen = len(data)
-		returnValue = bytearray()
-		while (True):
-			if (len(data) == 0):
-				self.buffer = bytes
-				break
-			bytes += (data.pop(0),)
-			if (bytes not in self.dict):
-				if (self.size == self.maxSize):
-					prev = self.dict[bytes[:-1]][1]
-					ba = bytearray()
-					ba.append(prev>>8)
-					ba.append(prev&255)
-					returnValue += ba
-					bytes = bytes[-1:]
-				else:
-					prev = self.dict[bytes[:-1]][1]
-					self.dict[bytes] = [prev, self.size]
-					self.size += 1
-					ba = bytearray()
-					ba.append(prev>>8)
-					ba.append(prev&255)
-					ba.append(bytes[-1:][0])
-					returnValue += ba
-					bytes = ()
-		return returnValue
-	def close(self):
-		bytes = ()
-		if (self.buffer is not None):
-			bytes = self.buffer
-			self.buffer = None
-		if (len(bytes) > 0):
-			prev = self.dict[bytes][1]
-			ba = bytearray()
-			ba.append(prev>>8)
-			ba.append(prev&255)
-			return ba
-class Decompressor:
-	def __init__(self):
-		self.uncompressDict = {}
-		for i in range(256):
-			self.uncompressDict[i] = [-1, (i,)]
-		self.size = 256
-		self.maxSize = 256*256
-		self.buffer = None
-	def decompress(self, data):
-		if (self.buffer is not None):
-			data = self.buffer+data
-			self.buffer = None
-		returnValue = bytearray()
-		while (True):
-			reqiredLength = 3
-			if (self.size == self.maxSize):
-				reqiredLength = 2
-			if (len(data) >= reqiredLength):
-				ba = bytearray()
-				ba.append(data.pop(0))
-				ba.append(data.pop(0))
-				if (self.size == self.maxSize):
-					index = (ba[0])<<8
-					index += ba[1]
-					bytes = self.uncompressDict[index][1]
-					for b in bytes:
-						returnValue.append(b)
-				else:
-					ba.append(data.pop(0))
-					prev = (ba[0])<<8
-					prev += ba[1]
-					bytes = self.uncompressDict[prev][1]
-					bytes += (ba[2],)
-					self.uncompressDict[self.size] = [prev, bytes]
-					self.size += 1
-					for b in bytes:
-						returnValue.append(b)
-			else:
-				self.buffer = data
-				return returnValue
+		return chunk
 	def close(self):
-		self.decompress(bytearray())
-class Encoder:
-	def __init__(self):
-		pass
-class Decoder:
-	def __init__(self):
-		pass
-class SBox:
+		"""
+		Closes the file being archived.
+		"""
+		if (self.readBuffer is not None):
+			self.readBuffer.close()
+			self.readBuffer = None
+class Dearchiver:
 	"""
-	SBox is a substitution cipher.
+	Dearchiver restores the files of a stream written by Archiver.
+	The stream may be split into chunks at arbitrary positions, data is written
+	straight from the chunks and only the bytes of split headers are buffered.
 		
 	Attributes:
-		encodeMap: lookuptable used to encode data
-		decodeMap: lookuptable used to decode data
+		folder (string): path to the restored folder
+		openFile (callable): opens a file for writing
+		writeBuffer (WriteBuffer): file being restored, None between files
+		filesize (int): number of bytes of the file, which are not restored yet
+		header (bytearray): received bytes of the current header
 		
 	Parameters:
-		pw: password
+		folder (string): path to folder
+		openFile (callable): opens a file for writing, gets the path and returns an object like WriteBuffer
+	"""
+	def __init__(self, folder, openFile=WriteBuffer):
+		self.folder = folder.rstrip("/")
+		self.openFile = openFile
+		self.writeBuffer = None
+		self.filesize = 0
+		self.header = bytearray()
+	def write(self, data):
+		"""
+		Restores the files of the next chunk of the archive.
 		
-	| **Pre:**
-	|	len(pw) == 256
-	|	pw[i] >= 0
-	|	pw[i] < 256
+		Parameters:
+			data (bytes-like): next chunk
+			
+		Raises:
+			ValueError: a path leaves the folder
+			
+		| **Modifies:**
+		|	self.writeBuffer
+		|	self.filesize
+		|	self.header
+		"""
+		view = memoryview(data)
+		pos = 0
+		while (pos < len(view)):
+			if (self.writeBuffer is not None):
+				size = min(self.filesize, len(view)-pos)
+				self.writeBuffer.write(view[pos:pos+size])
+				pos += size
+				self.filesize -= size
+				if (self.filesize == 0):
+					self.writeBuffer.close()
+					self.writeBuffer = None
+				continue
+			needed = 2
+			if (len(self.header) >= 2):
+				needed += int.from_bytes(self.header[:2], "big")+8
+			size = min(needed-len(self.header), len(view)-pos)
+			self.header += view[pos:pos+size]
+			pos += size
+			if (len(self.header) == needed and needed > 2):
+				self.openRecord()
+	def openRecord(self):
+		"""
+		Opens the file described by the complete header.
 		
-	| **Post:**
-	|	len(self.encodeMap) == 256
-	|	self.encodeMap[i] >= 0
-	|	self.encodeMap[i] < 256
-	|	len(self.decodeMap) == 256
-	|	self.decodeMap[i] >= 0
-	|	self.decodeMap[i] < 256
+		Raises:
+			ValueError: the path leaves the folder
+			
+		| **Post:**
+		|	len(self.header) == 0
+		"""
+		name = bytes(self.header[2:-8]).decode("utf-8")
+		self.filesize = int.from_bytes(self.header[-8:], "big")
+		self.header.clear()
+		self.writeBuffer = self.openFile(checkPath(self.folder, name))
+		if (self.filesize == 0):
+			self.writeBuffer.close()
+			self.writeBuffer = None
+	def close(self):
+		"""
+		Checks that the archive is complete.
+		
+		Raises:
+			ValueError: the archive ends within a record
+		"""
+		if (self.writeBuffer is not None):
+			self.writeBuffer.close()
+			self.writeBuffer = None
+			raise ValueError("archive ends within a file")
+		if (len(self.header) > 0):
+			raise ValueError("archive ends within a header")
+class Compressor:
 	"""
+	Compressor compresses data with LZW.
+	
+	Attributes:
+		dict: maps (code of a phrase << 8) + number to the code of the extended phrase
+		size: number of codes in use
+		maxSize: max number of codes
+		prefix: code of the pending phrase, -1 if there is none
+		adaptive: whether the dictionary is cleared when the compression ratio drops
+		windowSize: number of input bytes between two checks of the compression ratio
+		resetRatio: the dictionary is cleared if the ratio of a window drops below resetRatio*bestRatio
+		bestRatio: best ratio of a window since the dictionary got full
+		consumed: number of input bytes of previous calls
+		produced: number of output bytes of previous calls
+		windowConsumed: consumed at the start of the current window
+		windowProduced: produced at the start of the current window
+		clearCode: code telling the Decompressor to clear its dictionary in adaptive mode
+	
+	Parameters:
+		adaptive (bool): enables clearing of the dictionary
+	
+	Note:
+		While self.size < self.maxSize every new phrase is emitted as 3 bytes:
+		code of the known prefix (2 bytes, big endian) and the next number.
+		Afterwards the dictionary is frozen and only 2 byte codes are emitted.
+		In adaptive mode the last code is reserved for clearCode, which is
+		emitted when a full dictionary stops to compress well.
+	"""
+	clearCode = 256*256-1
 
-	def __init__(self, pw:List[int]):
-		self.encodeMap:List[int] = [-1]*256
-		self.decodeMap:List[int] = [-1]*256
-		index = 0
-		for i in range(256):
-			emptyCounter = 0
-			maxEmpty = 256-i
-			targetEmpty = 1+(pw[i] % maxEmpty)
-			while (emptyCounter < targetEmpty):
-				if (self.encodeMap[index] == -1):
-					emptyCounter += 1
-				if (emptyCounter < targetEmpty):
-					index = (index+1)%256
-			self.encodeMap[index] = i
-		for i in range(256):
-			self.decodeMap[self.encodeMap[i]] = i
-
-	def encode(self, plain:int) -> int:
+	def __init__(self, adaptive=False):
+		self.dict:Dict[int, int] = {}
+		self.size = 256
+		self.maxSize = 256*256
+		self.prefix = -1
+		self.adaptive = adaptive
+		if (adaptive):
+			self.maxSize = Compressor.clearCode
+		self.windowSize = 64*1024
+		self.resetRatio = 0.9
+		self.bestRatio = 0
+		self.consumed = 0
+		self.produced = 0
+		self.windowConsumed = 0
+		self.windowProduced = 0
+	def compress(self, data) -> bytearray:
 		"""
-		Encodes a single plain number.
+		Compresses data, the last phrase is kept pending until more data or close().
 		
 		Parameters:
-			plain: plain number
+			data (bytes, bytearray or memoryview): data to be compressed
 		
 		Returns:
-			encoded number
-			
-		| **Pre:**
-		|	plain >= 0
-		|	plain < 256
+			bytearray: compressed data
 			
-		| **Post:**
-		|	return >= 0
-		|	return < 256
+		| **Modifies:**
+		|	self.dict
+		|	self.size
+		|	self.prefix
 		"""
-		return self.encodeMap[plain]
-
-	def decode(self, encoded:int) -> int:
+		table = self.dict
+		size = self.size
+		maxSize = self.maxSize
+		prefix = self.prefix
+		adaptive = self.adaptive
+		returnValue = bytearray()
+		for index, c in enumerate(data):
+			if (prefix == -1):
+				prefix = c
+				continue
+			key = (prefix<<8)|c
+			code = table.get(key)
+			if (code is not None):
+				prefix = code
+			elif (size == maxSize):
+				returnValue.append(prefix>>8)
+				returnValue.append(prefix&255)
+				prefix = c
+				if (adaptive and self.consumed+index-self.windowConsumed >= self.windowSize):
+					if (self.checkRatio(self.consumed+index, self.produced+len(returnValue))):
+						returnValue.append(Compressor.clearCode>>8)
+						returnValue.append(Compressor.clearCode&255)
+						table = self.dict = {}
+						size = 256
+			else:
+				table[key] = size
+				size += 1
+				returnValue.append(prefix>>8)
+				returnValue.append(prefix&255)
+				returnValue.append(c)
+				prefix = -1
+				if (adaptive and size == maxSize):
+					self.bestRatio = 0
+					self.windowConsumed = self.consumed+index
+					self.windowProduced = self.produced+len(returnValue)
+		self.size = size
+		self.prefix = prefix
+		self.consumed += len(data)
+		self.produced += len(returnValue)
+		return returnValue
+	def checkRatio(self, consumed, produced) -> bool:
 		"""
-		Decodes a single encoded number.
+		Finishes a window of a full dictionary and decides whether to clear it.
 		
 		Parameters:
-			encoded: encoded number
+			consumed (int): number of input bytes so far
+			produced (int): number of output bytes so far
 		
 		Returns:
-			decoded number
+			bool: True if the dictionary should be cleared
 			
-		| **Pre:**
-		|	encoded >= 0
-		|	encoded < 256
+		| **Modifies:**
+		|	self.bestRatio
+		|	self.windowConsumed
+		|	self.windowProduced
+		"""
+		ratio = (consumed-self.windowConsumed)/max(1, produced-self.windowProduced)
+		self.windowConsumed = consumed
+		self.windowProduced = produced
+		if (ratio < self.bestRatio*self.resetRatio):
+			return True
+		self.bestRatio = max(self.bestRatio, ratio)
+		return False
+	def close(self) -> bytearray:
+		"""
+		Flushes the pending phrase.
+		
+		Returns:
+			bytearray: code of the pending phrase, empty if there is none
 			
-		| **Post:**
-		|	return >= 0
-		|	return < 256
+		| **Modifies:**
+		|	self.prefix
 		"""
-		return self.decodeMap[encoded]
-
-class PBox:
+		returnValue = bytearray()
+		if (self.prefix != -1):
+			returnValue.append(self.prefix>>8)
+			returnValue.append(self.prefix&255)
+			self.prefix = -1
+		return returnValue
+class Decompressor:
 	"""
-	PBox is a transposition cipher.
-		
+	Decompressor decompresses data compressed by Compressor.
+	
 	Attributes:
-		encodeMap: lookuptable used to encode data
-		decodeMap: lookuptable used to decode data
-		
+		prefix: code of the phrase without its last number, -1 for single numbers
+		last: last number of the phrase
+		length: length of the phrase
+		size: number of codes in use
+		maxSize: max number of codes
+		buffer: incomplete code of the previous call
+		adaptive: whether Compressor.clearCode clears the dictionary
+	
 	Parameters:
-		pw: password
+		adaptive (bool): must match the Compressor
+	
+	Note:
+		Phrases are never stored as a whole, they are written back to front
+		by following self.prefix. Memory is bounded by self.maxSize entries.
+	"""
+	def __init__(self, adaptive=False):
+		self.adaptive = adaptive
+		self.maxSize = 256*256
+		self.prefix = array("i", [-1])*self.maxSize
+		self.last = array("B", range(256))+array("B", [0])*(self.maxSize-256)
+		self.length = array("I", [1])*self.maxSize
+		self.size = 256
+		self.buffer = b""
+		if (adaptive):
+			self.maxSize = Compressor.clearCode
+	def decompress(self, data) -> bytearray:
+		"""
+		Decompresses data, incomplete codes are kept until more data or close().
 		
-	| **Pre:**
-	|	len(pw) == 2048
-	|	pw[i] >= 0
-	|	pw[i] < 256
+		Parameters:
+			data (bytes, bytearray or memoryview): data to be decompressed
 		
-	| **Post:**
-	|	len(self.encodeMap) == 2048
-	|	self.encodeMap[i] >= 0
-	|	self.encodeMap[i] < 2048
-	|	len(self.decodeMap) == 2048
-	|	self.decodeMap[i] >= 0
-	|	self.decodeMap[i] < 2048
-	"""
-	def __init__(self, pw:List[int]):
-		self.encodeMap:List[int] = [-1]*(256*8)
-		self.decodeMap:List[int] = [-1]*(256*8)
-		index = 0
-		for i in range(256*8):
-			emptyCounter = 0
-			maxEmpty = 256*8-i
-			targetEmpty = 1+(pw[i] % maxEmpty)
-			while (emptyCounter < targetEmpty):
-				if (self.encodeMap[index] == -1):
-					emptyCounter += 1
-				if (emptyCounter < targetEmpty):
-					index = (index+1)%(256*8)
-			self.encodeMap[index] = i
-		for i in range(256*8):
-			self.decodeMap[self.encodeMap[i]] = i
-
-	def encode(self, plain:List[int], seed:int) -> List[int]:
+		Returns:
+			bytearray: decompressed data
+			
+		| **Modifies:**
+		|	self.prefix
+		|	self.last
+		|	self.length
+		|	self.size
+		|	self.buffer
 		"""
-		Encodes a block of plain numbers.
+		if (len(self.buffer) > 0):
+			data = self.buffer+bytes(data)
+		prefix = self.prefix
+		last = self.last
+		length = self.length
+		size = self.size
+		maxSize = self.maxSize
+		adaptive = self.adaptive
+		dataLength = len(data)
+		returnValue = bytearray()
+		codes = []
+		total = 0
+		pos = 0
+		while (True):
+			if (size == maxSize):
+				if (pos+2 > dataLength):
+					break
+				code = (data[pos]<<8)|data[pos+1]
+				pos += 2
+				if (adaptive and code == Compressor.clearCode):
+					returnValue += self.writePhrases(codes, total)
+					codes = []
+					total = 0
+					size = 256
+					continue
+			else:
+				if (pos+3 > dataLength):
+					break
+				prev = (data[pos]<<8)|data[pos+1]
+				code = size
+				prefix[code] = prev
+				last[code] = data[pos+2]
+				length[code] = length[prev]+1
+				size += 1
+				pos += 3
+			codes.append(code)
+			total += length[code]
+		self.size = size
+		self.buffer = bytes(data[pos:])
+		if (len(returnValue) == 0):
+			return self.writePhrases(codes, total)
+		return returnValue+self.writePhrases(codes, total)
+	def writePhrases(self, codes, total) -> bytearray:
+		"""
+		Writes the phrases of codes into a preallocated bytearray.
 		
 		Parameters:
-			plain: block of plain numbers
-			seed: seed
+			codes (list): codes of the phrases
+			total (int): sum of the lengths of the phrases
 		
 		Returns:
-			block of encoded numbers
-			
-		| **Pre:**
-		|	len(plain) == 256
-		|	plain[i] >= 0
-		|	plain[i] < 256
-		|	seed >= 0
-		|	seed < 256
+			bytearray: concatenated phrases
+		"""
+		prefix = self.prefix
+		last = self.last
+		length = self.length
+		returnValue = bytearray(total)
+		pos = 0
+		for code in codes:
+			pos += length[code]
+			index = pos-1
+			while (code != -1):
+				returnValue[index] = last[code]
+				code = prefix[code]
+				index -= 1
+		return returnValue
+	def close(self) -> bytearray:
+		"""
+		Decompresses the final code, which the Compressor emits as 2 bytes.
+		
+		Returns:
+			bytearray: decompressed data
 			
-		| **Post:**
-		|	len(return) == 256
-		|	return[i] >= 0
-		|	return[i] < 256
+		| **Modifies:**
+		|	self.buffer
 		"""
-		encoded = [0]*256
-		for i in range(256):
-			indexVar = i*8+seed
-			for b in range(8):
-				if ((plain[i]) & (1<<b)):
-					index = self.encodeMap[(b+indexVar)%2048]
-					index8 = int(index/8)
-					encoded[index8] = encoded[index8] + (1<<(index%8))
-		return encoded
-
-	def decode(self, encoded:List[int], seed:int) -> List[int]:
+		codes = []
+		if (len(self.buffer) == 2):
+			codes.append((self.buffer[0]<<8)|self.buffer[1])
+		self.buffer = b""
+		return self.writePhrases(codes, sum(self.length[code] for code in codes))
+class LibraryCompressor:
+	"""
+	LibraryCompressor adapts compressobjects of zlib, lzma and bz2 to the interface of Compressor.
+	
+	Attributes:
+		compressObject: compressobject of the library
+	
+	Parameters:
+		compressObject: compressobject of the library, None to store data uncompressed
+	"""
+	def __init__(self, compressObject=None):
+		self.compressObject = compressObject
+	def compress(self, data) -> bytes:
 		"""
-		Decodes a block of encoded numbers.
+		Compresses data.
 		
 		Parameters:
-			encoded: block of encoded numbers
-			seed: seed
+			data (bytes, bytearray or memoryview): data to be compressed
 		
 		Returns:
-			block of decoded numbers
-			
-		| **Pre:**
-		|	len(encoded) == 256
-		|	encoded[i] >= 0
-		|	encoded[i] < 256
-		|	seed >= 0
-		|	seed < 256
-			
-		| **Post:**
-		|	len(return) == 256
-		|	return[i] >= 0
-		|	return[i] < 256
+			bytes: compressed data
 		"""
-		decoded = [0]*256
-		for i in range(256):
-			indexVar = i*8
-			for b in range(8):
-				if ((encoded[i]) & (1<<b)):
-					index = self.decodeMap[indexVar+b] - seed
-					if (index < 0):
-						index += 2048
-					index8 = int(index/8)
-					decoded[index8] = decoded[index8] + (1<<(index%8))
-		return decoded
-
-class SPBox:
+		if (self.compressObject is None):
+			return bytes(data)
+		return self.compressObject.compress(data)
+	def close(self) -> bytes:
+		"""
+		Flushes the compressobject.
+		
+		Returns:
+			bytes: remaining compressed data
+		"""
+		if (self.compressObject is None):
+			return b""
+		return self.compressObject.flush()
+class LibraryDecompressor:
 	"""
-	SPBox is a substitution-permutation network.
+	LibraryDecompressor adapts decompressobjects of zlib, lzma and bz2 to the interface of Decompressor.
+	
+	Attributes:
+		decompressObject: decompressobject of the library
+	
+	Parameters:
+		decompressObject: decompressobject of the library, None for uncompressed data
+	"""
+	def __init__(self, decompressObject=None):
+		self.decompressObject = decompressObject
+	def decompress(self, data) -> bytes:
+		"""
+		Decompresses data.
+		
+		Parameters:
+			data (bytes, bytearray or memoryview): data to be decompressed
+		
+		Returns:
+			bytes: decompressed data
+		"""
+		if (self.decompressObject is None):
+			return bytes(data)
+		return self.decompressObject.decompress(data)
+	def close(self) -> bytes:
+		"""
+		Flushes the decompressobject.
 		
+		Returns:
+			bytes: remaining decompressed data
+		"""
+		if (hasattr(self.decompressObject, "flush")):
+			return self.decompressObject.flush()
+		return b""
+class Codec:
+	"""
+	Codec is a compression method, which can be selected for containers of type 2 and 3.
+	
 	Attributes:
-		sBoxes: list of SBoxes used for substitution
-		seed: seed
-		pBox: PBox used for permutation
+		id: number stored in the container
+		name: name used by the commandlineinterface
+		defaultLevel: level used if none is given
+		createCompressor: function creating a compressor from a level
+		createDecompressor: function creating a decompressor
+	
+	Parameters:
+		id (int): number stored in the container
+		name (string): name used by the commandlineinterface
+		defaultLevel (int): level used if none is given
+		createCompressor (function): function creating a compressor from a level
+		createDecompressor (function): function creating a decompressor
+	"""
+	def __init__(self, id, name, defaultLevel, createCompressor, createDecompressor):
+		self.id = id
+		self.name = name
+		self.defaultLevel = defaultLevel
+		self.createCompressor = createCompressor
+		self.createDecompressor = createDecompressor
+	def getCompressor(self, level=None):
+		"""
+		Creates a compressor.
+		
+		Parameters:
+			level (int): compression level, None for self.defaultLevel
+		
+		Returns:
+			Compressor or LibraryCompressor: new compressor
+		"""
+		if (level is None):
+			level = self.defaultLevel
+		return self.createCompressor(level)
+	def getDecompressor(self):
+		"""
+		Creates a decompressor.
 		
+		Returns:
+			Decompressor or LibraryDecompressor: new decompressor
+		"""
+		return self.createDecompressor()
+codecs:List[Codec] = [
+	Codec(0, "lzw", None, lambda level: Compressor(), lambda: Decompressor()),
+	Codec(1, "lzw-adaptive", None, lambda level: Compressor(True), lambda: Decompressor(True)),
+	Codec(2, "zlib", 6, lambda level: LibraryCompressor(zlib.compressobj(level)), lambda: LibraryDecompressor(zlib.decompressobj())),
+	Codec(3, "lzma", 6, lambda level: LibraryCompressor(lzma.LZMACompressor(preset=level)), lambda: LibraryDecompressor(lzma.LZMADecompressor())),
+	Codec(4, "bz2", 9, lambda level: LibraryCompressor(bz2.BZ2Compressor(level)), lambda: LibraryDecompressor(bz2.BZ2Decompressor())),
+	Codec(5, "none", None, lambda level: LibraryCompressor(), lambda: LibraryDecompressor()),
+]
+def getCodec(name):
+	"""
+	Gets a codec by its name.
+	
 	Parameters:
-		pw: password
-		seed: seed
+		name (string): name of the codec
+	
+	Returns:
+		Codec: codec
+	"""
+	for codec in codecs:
+		if (codec.name == name):
+			return codec
+	raise ValueError("unknown codec "+name)
+def getEntropy(data) -> float:
+	"""
+	Calculates the entropy of data.
+	
+	Parameters:
+		data (bytes): data
+	
+	Returns:
+		float: bits per byte, 0 <= return <= 8
+	"""
+	entropy = 0.0
+	for count in Counter(data).values():
+		p = count/len(data)
+		entropy -= p*math.log2(p)
+	return entropy
+class Encoder:
+	"""
+	Encoder encodes data written to it into the stream of a container.
+		
+	Attributes:
+		edoc (Edoc): provides the SPBox and the process pool
+		fOut (file): seekable file the stream is written to
+		segmentSize (int): plain numbers per independently seeded segment, 0 for a single seed chain
+		headerPos (int): position of the length in fOut
+		length (int): number of plain numbers written so far
+		buffer (bytearray): plain numbers not encoded yet
+		work (bytearray): buffer blocks are encoded in
+		segmentRemaining (int): plain numbers left in the current segment
+		parallel (bool): whether whole segments are encoded by the process pool
+		pending (deque): segments submitted to the process pool, which are not written yet
+		
+	Parameters:
+		edoc (Edoc): provides the SPBox and the process pool
+		fOut (file): seekable file the stream is written to
+		segmentSize (int): plain numbers per independently seeded segment, 0 for a single seed chain
 		
 	| **Pre:**
-	|	len(pw) == 4096
-	|	pw[i] >= 0
-	|	pw[i] < 256
-	|	len(seed) == 256
-	|	seed[i] >= 1
-	|	seed[i] < 256
+	|	segmentSize % 256 == 0
 		
-	| **Post:**
-	|	len(self.sBoxes) == 8
-	|	len(self.seed) == 256
-	|	self.seed[i] >= 1
-	|	self.seed[i] < 256
+	Note:
+		The stream starts with the length (8 bytes), followed by segmentSize (8 bytes) if segmentSize > 0.
+		Every segment starts with a fresh seed followed by its encoded blocks,
+		the last block is padded with random numbers.
+		Without segments the whole stream is a single segment.
+		The length is written by close().
 	"""
-	def __init__(self, pw:List[int], seed:List[int]=None):
-		self.sBoxes:List[SBox] = [None]*8
-		if (seed is None):
-			seed = [0]*256
-			for i in range(256):
-				seed[i] = randint(1, 255)
-		self.seed:List[int] = deepcopy(seed)
-		for s in range(8):
-			spw = [0]*256
-			for i in range(256):
-				spw[i] = pw[s*256+i]
-			self.sBoxes[s] = SBox(spw)
-		ppw = [0]*2048
-		for i in range(2048):
-			ppw[i] = pw[8*256+i]
-		self.pBox:PBox = PBox(ppw)
-
-	def encodeRound(self, plain:List[int], round:int, pSeed:int) -> List[int]:
+	def __init__(self, edoc, fOut, segmentSize=0):
+		self.edoc = edoc
+		self.fOut = fOut
+		self.segmentSize = segmentSize
+		self.headerPos = fOut.tell()
+		self.length = 0
+		self.buffer = bytearray()
+		self.work = bytearray(edoc.blockBufferSize)
+		self.segmentRemaining = 0
+		self.parallel = edoc.jobs > 1 and segmentSize > 0
+		self.pending = deque()
+		fOut.write(bytes(8))
+		if (segmentSize > 0):
+			fOut.write(segmentSize.to_bytes(8, "big"))
+		else:
+			self.startSegment(sys.maxsize)
+	def write(self, data):
 		"""
-		Encodes a block of plain numbers.
+		Encodes data, incomplete blocks are kept until more data or close().
 		
 		Parameters:
-			plain: block of plain numbers
-			round: iteration of encode
-			pSeed: seed for PBox
-		
-		Returns:
-			block of encoded numbers
-			
-		| **Pre:**
-		|	len(plain) == 256
-		|	plain[i] >= 0
-		|	plain[i] < 256
-		|	round >= 0
-		|	round < 8
-		|	pSeed >= 0
-		|	pSeed < 256
+			data (bytes, bytearray or memoryview): plain numbers
 			
+		| **Modifies:**
+		|	self.buffer
+		|	self.length
+		|	self.fOut
+		"""
+		self.length += len(data)
+		self.buffer += data
+		if (self.parallel):
+			while (len(self.buffer) >= self.segmentSize):
+				self.submit(bytes(self.buffer[:self.segmentSize]))
+				del self.buffer[:self.segmentSize]
+		elif (len(self.buffer) >= self.edoc.blockBufferSize):
+			self.encodeBuffer(False)
+	def close(self):
+		"""
+		Encodes the remaining data and writes the length.
+		
 		| **Post:**
-		|	len(return) == 256
-		|	return[i] >= 0
-		|	return[i] < 256
+		|	self.fOut is positioned at the end of the stream
+			
+		| **Modifies:**
+		|	self.fOut
 		"""
-		encoded = [0]*256
-		for i in range(256):
-			seedAtI = self.seed[i]
-			encoded[i] = plain[i] ^ self.sBoxes[round].encodeMap[i] ^ seedAtI
-			for j in range(8):
-				if ((seedAtI & (1<<j)) != 0):
-					encoded[i] = self.sBoxes[j].encodeMap[encoded[i]]#replacement for SBox.encode() to improve performance
-		encoded = self.pBox.encode(encoded, pSeed)
-		return encoded
-
-	def decodeRound(self, encoded:List[int], round:int, pSeed:int) -> List[int]:
+		if (self.parallel):
+			if (len(self.buffer) > 0):
+				self.submit(bytes(self.buffer))
+				self.buffer = bytearray()
+			while (len(self.pending) > 0):
+				self.fOut.write(self.pending.popleft().result())
+		else:
+			self.encodeBuffer(True)
+		end = self.fOut.tell()
+		self.fOut.seek(self.headerPos)
+		self.fOut.write(self.length.to_bytes(8, "big"))
+		self.fOut.seek(end)
+	def startSegment(self, length):
 		"""
-		Decodes a block of encoded numbers.
+		Draws and writes a fresh seed.
 		
 		Parameters:
-			encoded: block of encoded numbers
-			round: iteration of decode
-			pSeed: seed for PBox
-		
-		Returns:
-			block of decoded numbers
-			
-		| **Pre:**
-		|	len(encoded) == 256
-		|	encoded[i] >= 0
-		|	encoded[i] < 256
-		|	round >= 0
-		|	round < 8
-		|	pSeed >= 0
-		|	pSeed < 256
+			length (int): max number of plain numbers encoded with this seed
 			
-		| **Post:**
-		|	len(return) == 256
-		|	return[i] >= 0
-		|	return[i] < 256
+		| **Modifies:**
+		|	self.edoc.spBox.seed
+		|	self.segmentRemaining
+		|	self.fOut
 		"""
-		decoded = self.pBox.decode(encoded, pSeed)
+		seed = [1]*256
 		for i in range(256):
-			seedAtI = self.seed[i]
-			for invertedJ in range(8):
-				j = 8-1-invertedJ
-				if ((seedAtI & (1<<j)) != 0):
-					decoded[i] = self.sBoxes[j].decodeMap[decoded[i]]#replacement for SBox.decode() to improve performance
-			decoded[i] = decoded[i] ^ self.sBoxes[round].encodeMap[i] ^ seedAtI
-		return decoded
-
-	def encodeRounds(self, plain:List[int]) -> List[int]:#TODO rename to encode
+			seed[i] = randint(1, 255)
+		self.edoc.spBox.setSeed(seed)
+		self.fOut.write(self.edoc.spBox.seed)
+		self.segmentRemaining = length
+	def encodeBuffer(self, final):
 		"""
-		Encodes a block of plain numbers.
+		Encodes all complete blocks of self.buffer.
 		
 		Parameters:
-			plain: block of plain numbers
-		
-		Returns:
-			block of encoded numbers
-			
-		| **Pre:**
-		|	len(plain) == 256
-		|	plain[i] >= 0
-		|	plain[i] < 256
+			final (bool): also encode the last incomplete block
 			
-		| **Post:**
-		|	len(return) == 256
-		|	return[i] >= 0
-		|	return[i] < 256
+		| **Modifies:**
+		|	self.buffer
+		|	self.segmentRemaining
+		|	self.fOut
+		"""
+		offset = 0
+		view = memoryview(self.buffer)
+		work = memoryview(self.work)
+		while (True):
+			available = len(self.buffer)-offset
+			if (not final):
+				available -= available%256
+			if (available == 0):
+				break
+			if (self.segmentRemaining == 0):
+				self.startSegment(self.segmentSize)
+			n = min(available, self.segmentRemaining, len(self.work))
+			padded = n+(-n)%256
+			work[:n] = view[offset:offset+n]
+			for i in range(n, padded):
+				self.work[i] = randint(0, 255)
+			self.edoc.spBox.encodeBlocks(work[:padded], work)
+			self.fOut.write(work[:padded])
+			offset += n
+			self.segmentRemaining -= n
+		view.release()
+		del self.buffer[:offset]
+	def submit(self, segment):
+		"""
+		Encodes a whole segment on the process pool and writes finished segments in order.
+		
+		Parameters:
+			segment (bytes): plain numbers of the segment
 			
 		| **Modifies:**
-		|	self.seed[i]
+		|	self.pending
+		|	self.fOut
 		"""
-		pSeed = 0
-		for i in range(256):
-			pSeed = (pSeed+self.seed[i])%256
-		encoded = self.encodeRound(plain, 0, pSeed)
-		for i in range(7):
-			encoded = self.encodeRound(encoded, i+1, pSeed)
+		self.pending.append(self.edoc.getExecutor().submit(encodeSegment, segment))
+		if (len(self.pending) > self.edoc.jobs):
+			self.fOut.write(self.pending.popleft().result())
+class Decoder:
+	"""
+	Decoder decodes the stream of a container written by Encoder.
+		
+	Attributes:
+		edoc (Edoc): provides the SPBox and the process pool
+		fIn (file or ReadBuffer): file positioned at the start of the stream
+		length (int): number of plain numbers
+		segments (deque): position and length of the segments not started yet
+		end (int): position after the stream
+		buffer (bytearray): buffer blocks are decoded in
+		plainRemaining (int): plain numbers left in the current segment
+		encodedRemaining (int): encoded numbers left in the current segment
+		parallel (bool): whether whole segments are decoded by the process pool
+		pending (deque): segments submitted to the process pool, which are not returned yet
+		
+	Parameters:
+		edoc (Edoc): provides the SPBox and the process pool
+		fIn (file or ReadBuffer): file positioned at the start of the stream
+		segmented (bool): whether the stream has segments
+	"""
+	def __init__(self, edoc, fIn, segmented=False):
+		self.edoc = edoc
+		self.fIn = fIn
+		self.length = int.from_bytes(fIn.read(8), "big")
+		self.segments = deque()
+		offset = fIn.tell()
+		if (segmented):
+			segmentSize = int.from_bytes(fIn.read(8), "big")
+			offset += 8
+			for plainOffset in range(0, self.length, segmentSize):
+				length = min(self.length-plainOffset, segmentSize)
+				self.segments.append((offset, length))
+				offset += 256+length+(-length)%256
+		else:
+			self.segments.append((offset, self.length))
+			offset += 256+self.length+(-self.length)%256
+		self.end = offset
+		self.buffer = bytearray(edoc.blockBufferSize)
+		self.plainRemaining = 0
+		self.encodedRemaining = 0
+		self.parallel = edoc.jobs > 1 and len(self.segments) > 1
+		self.pending = deque()
+	def read(self) -> bytes:
+		"""
+		Decodes the next chunk of the stream.
+		
+		Returns:
+			bytes: plain numbers, empty at the end of the stream
+			
+		| **Modifies:**
+		|	self.segments
+		|	self.fIn
+		"""
+		if (self.parallel):
+			while (len(self.segments) > 0 and len(self.pending) <= self.edoc.jobs):
+				offset, length = self.segments.popleft()
+				self.pending.append(self.edoc.getExecutor().submit(decodeSegment, self.fIn.name, offset, length))
+			if (len(self.pending) == 0):
+				return b""
+			return self.pending.popleft().result()
+		while (self.plainRemaining == 0):
+			if (len(self.segments) == 0):
+				return b""
+			offset, length = self.segments.popleft()
+			self.edoc.spBox.setSeed(self.fIn.read(256))
+			self.plainRemaining = length
+			self.encodedRemaining = length+(-length)%256
+		view = memoryview(self.buffer)
+		encoded = self.fIn.read(min(self.encodedRemaining, len(self.buffer)))
+		n = len(encoded)
+		self.edoc.spBox.decodeBlocks(encoded, view)
+		n = min(n, self.plainRemaining)
+		self.encodedRemaining -= n+(-n)%256
+		self.plainRemaining -= n
+		return bytes(view[:n])
+	def close(self):
+		"""
+		Skips the rest of the stream.
+		
+		| **Post:**
+		|	self.fIn is positioned at the end of the stream
+		"""
+		self.fIn.seek(self.end)
+class DecompressWriter:
+	"""
+	DecompressWriter decompresses data written to it into a file.
+		
+	Attributes:
+		decompressor: Decompressor or LibraryDecompressor
+		fOut (WriteBuffer): filereference
+		
+	Parameters:
+		decompressor: Decompressor or LibraryDecompressor
+		fOut (WriteBuffer): file the plain data is written to
+	"""
+	def __init__(self, decompressor, fOut):
+		self.decompressor = decompressor
+		self.fOut = fOut
+	def write(self, data):
+		"""
+		Decompresses data into the file.
+		
+		Parameters:
+			data (bytes): compressed data
+		"""
+		self.fOut.write(self.decompressor.decompress(data))
+	def close(self):
+		"""
+		Flushes the decompressor and closes the file.
+		"""
+		self.fOut.write(self.decompressor.close())
+		self.fOut.close()
+class SBox:
+	"""
+	SBox is a substitution cipher.
+		
+	Attributes:
+		encodeMap: lookuptable used to encode data
+		decodeMap: lookuptable used to decode data
+		
+	Parameters:
+		pw: password
+		
+	| **Pre:**
+	|	len(pw) == 256
+	|	pw[i] >= 0
+	|	pw[i] < 256
+		
+	| **Post:**
+	|	len(self.encodeMap) == 256
+	|	self.encodeMap[i] >= 0
+	|	self.encodeMap[i] < 256
+	|	len(self.decodeMap) == 256
+	|	self.decodeMap[i] >= 0
+	|	self.decodeMap[i] < 256
+	"""
+
+	def __init__(self, pw:List[int]):
+		self.encodeMap:List[int] = [-1]*256
+		self.decodeMap:List[int] = [-1]*256
+		index = 0
+		for i in range(256):
+			emptyCounter = 0
+			maxEmpty = 256-i
+			targetEmpty = 1+(pw[i] % maxEmpty)
+			while (emptyCounter < targetEmpty):
+				if (self.encodeMap[index] == -1):
+					emptyCounter += 1
+				if (emptyCounter < targetEmpty):
+					index = (index+1)%256
+			self.encodeMap[index] = i
+		for i in range(256):
+			self.decodeMap[self.encodeMap[i]] = i
+
+	def encode(self, plain:int) -> int:
+		"""
+		Encodes a single plain number.
+		
+		Parameters:
+			plain: plain number
+		
+		Returns:
+			encoded number
+			
+		| **Pre:**
+		|	plain >= 0
+		|	plain < 256
+			
+		| **Post:**
+		|	return >= 0
+		|	return < 256
+		"""
+		return self.encodeMap[plain]
+
+	def decode(self, encoded:int) -> int:
+		"""
+		Decodes a single encoded number.
+		
+		Parameters:
+			encoded: encoded number
+		
+		Returns:
+			decoded number
+			
+		| **Pre:**
+		|	encoded >= 0
+		|	encoded < 256
+			
+		| **Post:**
+		|	return >= 0
+		|	return < 256
+		"""
+		return self.decodeMap[encoded]
+
+class PBox:
+	"""
+	PBox is a transposition cipher.
+		
+	Attributes:
+		encodeMap: lookuptable used to encode data
+		decodeMap: lookuptable used to decode data
+		encodeGetter: gathers the encoded bits of a block from its rotated plain bits
+		decodeGetter: gathers the rotated decoded bits of a block from its encoded bits
+		bitPlanes: translationtables extracting bit b of a number
+		
+	Parameters:
+		pw: password
+		
+	Note:
+		Bit b of plain[i] is moved to bit encodeMap[(i*8+b+seed)%2048] of the encoded block.
+		Instead of moving single bits, a block is unpacked into one byte per bit,
+		rotated by the seed, gathered by a precomputed itemgetter and packed again.
+		
+	| **Pre:**
+	|	len(pw) == 2048
+	|	pw[i] >= 0
+	|	pw[i] < 256
+		
+	| **Post:**
+	|	len(self.encodeMap) == 2048
+	|	self.encodeMap[i] >= 0
+	|	self.encodeMap[i] < 2048
+	|	len(self.decodeMap) == 2048
+	|	self.decodeMap[i] >= 0
+	|	self.decodeMap[i] < 2048
+	"""
+	bitPlanes:List[bytes] = [bytes((v >> b) & 1 for v in range(256)) for b in range(8)]
+
+	def __init__(self, pw:List[int]):
+		self.encodeMap:List[int] = [-1]*(256*8)
+		self.decodeMap:List[int] = [-1]*(256*8)
+		index = 0
+		for i in range(256*8):
+			emptyCounter = 0
+			maxEmpty = 256*8-i
+			targetEmpty = 1+(pw[i] % maxEmpty)
+			while (emptyCounter < targetEmpty):
+				if (self.encodeMap[index] == -1):
+					emptyCounter += 1
+				if (emptyCounter < targetEmpty):
+					index = (index+1)%(256*8)
+			self.encodeMap[index] = i
+		for i in range(256*8):
+			self.decodeMap[self.encodeMap[i]] = i
+		self.encodeGetter = itemgetter(*self.decodeMap)
+		self.decodeGetter = itemgetter(*self.encodeMap)
+
+	def encode(self, plain:bytes, seed:int) -> bytes:
+		"""
+		Encodes a block of plain numbers.
+		
+		Parameters:
+			plain: block of plain numbers
+			seed: seed
+		
+		Returns:
+			block of encoded numbers
+			
+		| **Pre:**
+		|	len(plain) == 256
+		|	plain[i] >= 0
+		|	plain[i] < 256
+		|	seed >= 0
+		|	seed < 256
+			
+		| **Post:**
+		|	len(return) == 256
+		|	return[i] >= 0
+		|	return[i] < 256
+		"""
+		bits = PBox.unpackBits(plain)
+		rotated = bits[2048-seed:]+bits[:2048-seed]
+		return PBox.packBits(bytes(self.encodeGetter(rotated)))
+
+	def decode(self, encoded:bytes, seed:int) -> bytes:
+		"""
+		Decodes a block of encoded numbers.
+		
+		Parameters:
+			encoded: block of encoded numbers
+			seed: seed
+		
+		Returns:
+			block of decoded numbers
+			
+		| **Pre:**
+		|	len(encoded) == 256
+		|	encoded[i] >= 0
+		|	encoded[i] < 256
+		|	seed >= 0
+		|	seed < 256
+			
+		| **Post:**
+		|	len(return) == 256
+		|	return[i] >= 0
+		|	return[i] < 256
+		"""
+		gathered = bytes(self.decodeGetter(PBox.unpackBits(encoded)))
+		return PBox.packBits(gathered[seed:]+gathered[:seed])
+
+	@staticmethod
+	def unpackBits(block:bytes) -> bytearray:
+		"""
+		Splits a block into one byte per bit.
+		
+		Parameters:
+			block: block of numbers
+		
+		Returns:
+			bits of the block, bit b of block[i] is stored at i*8+b
+			
+		| **Pre:**
+		|	len(block) == 256
+		|	block[i] >= 0
+		|	block[i] < 256
+			
+		| **Post:**
+		|	len(return) == 2048
+		|	return[i] in (0, 1)
+		"""
+		block = bytes(block)
+		bits = bytearray(2048)
+		for b in range(8):
+			bits[b::8] = block.translate(PBox.bitPlanes[b])
+		return bits
+
+	@staticmethod
+	def packBits(bits:bytes) -> bytes:
+		"""
+		Joins one byte per bit into a block, inverse of unpackBits.
+		
+		Parameters:
+			bits: bits of the block, bit b of block[i] is stored at i*8+b
+		
+		Returns:
+			block of numbers
+			
+		| **Pre:**
+		|	len(bits) == 2048
+		|	bits[i] in (0, 1)
+			
+		| **Post:**
+		|	len(return) == 256
+		|	return[i] >= 0
+		|	return[i] < 256
+		"""
+		packed = 0
+		for b in range(8):
+			packed |= int.from_bytes(bits[b::8], "little") << b
+		return packed.to_bytes(256, "little")
+
+class SPBox:
+	"""
+	SPBox is a substitution-permutation network.
+		
+	Attributes:
+		sBoxes: list of SBoxes used for substitution
+		seed: seed
+		pBox: PBox used for permutation
+		roundKeys: encodeMap of the SBox of each round as number
+		encodeChains: lazily built fused lookuptables, one per seed number, applying all SBoxes selected by its bits
+		decodeChains: lazily built inverse of encodeChains
+		seedKey: seed as number
+		pSeed: seed for PBox derived from seed
+		seedEncodeChains: encodeChains selected by seed[i], built on demand
+		seedDecodeChains: decodeChains selected by seed[i], built on demand
+		zeroToOne: translationtable replacing 0 by 1
+		
+	Parameters:
+		pw: password
+		seed: seed
+		
+	Note:
+		encodeChains and decodeChains only depend on the password.
+		They are kept when the seed changes.
+		
+	| **Pre:**
+	|	len(pw) == 4096
+	|	pw[i] >= 0
+	|	pw[i] < 256
+	|	len(seed) == 256
+	|	seed[i] >= 1
+	|	seed[i] < 256
+		
+	| **Post:**
+	|	len(self.sBoxes) == 8
+	|	len(self.seed) == 256
+	|	self.seed[i] >= 1
+	|	self.seed[i] < 256
+	"""
+	zeroToOne:bytes = bytes([1])+bytes(range(1, 256))
+
+	def __init__(self, pw:List[int], seed:List[int]=None):
+		self.sBoxes:List[SBox] = [None]*8
+		if (seed is None):
+			seed = [0]*256
+			for i in range(256):
+				seed[i] = randint(1, 255)
+		for s in range(8):
+			spw = [0]*256
+			for i in range(256):
+				spw[i] = pw[s*256+i]
+			self.sBoxes[s] = SBox(spw)
+		ppw = [0]*2048
+		for i in range(2048):
+			ppw[i] = pw[8*256+i]
+		self.pBox:PBox = PBox(ppw)
+		self.roundKeys:List[int] = [int.from_bytes(bytes(sBox.encodeMap), "little") for sBox in self.sBoxes]
+		self.encodeChains:List[bytes] = [None]*256
+		self.decodeChains:List[bytes] = [None]*256
+		self.setSeed(seed)
+
+	def buildChain(self, seedAtI:int):
+		"""
+		Builds the fused lookuptables for a single seed number.
+		
+		Parameters:
+			seedAtI: seed number
+			
+		| **Pre:**
+		|	seedAtI >= 0
+		|	seedAtI < 256
+			
+		| **Post:**
+		|	len(self.encodeChains[seedAtI]) == 256
+		|	len(self.decodeChains[seedAtI]) == 256
+		|	self.decodeChains[seedAtI][self.encodeChains[seedAtI][i]] == i
+			
+		| **Modifies:**
+		|	self.encodeChains[seedAtI]
+		|	self.decodeChains[seedAtI]
+		"""
+		encodeChain = bytes(range(256))
+		for j in range(8):
+			if ((seedAtI & (1<<j)) != 0):
+				encodeChain = encodeChain.translate(bytes(self.sBoxes[j].encodeMap))
+		decodeChain = bytearray(256)
+		for i in range(256):
+			decodeChain[encodeChain[i]] = i
+		self.encodeChains[seedAtI] = encodeChain
+		self.decodeChains[seedAtI] = bytes(decodeChain)
+
+	def getSeedChains(self, chains:List[bytes]) -> List[bytes]:
+		"""
+		Selects the fused lookuptable of every seed number, building missing ones.
+		
+		Parameters:
+			chains: self.encodeChains or self.decodeChains
+		
+		Returns:
+			chains[self.seed[i]]
+			
+		| **Post:**
+		|	len(return) == 256
+		|	len(return[i]) == 256
+			
+		| **Modifies:**
+		|	self.encodeChains[i]
+		|	self.decodeChains[i]
+		"""
+		seedChains = list(map(chains.__getitem__, self.seed))
+		if (None in seedChains):
+			for seedAtI in set(self.seed):
+				if (chains[seedAtI] is None):
+					self.buildChain(seedAtI)
+			seedChains = list(map(chains.__getitem__, self.seed))
+		return seedChains
+
+	def encodeRound(self, plain:bytes, round:int, pSeed:int) -> bytes:
+		"""
+		Encodes a block of plain numbers.
+		
+		Parameters:
+			plain: block of plain numbers
+			round: iteration of encode
+			pSeed: seed for PBox
+		
+		Returns:
+			block of encoded numbers
+			
+		| **Pre:**
+		|	len(plain) == 256
+		|	plain[i] >= 0
+		|	plain[i] < 256
+		|	round >= 0
+		|	round < 8
+		|	pSeed >= 0
+		|	pSeed < 256
+			
+		| **Post:**
+		|	len(return) == 256
+		|	return[i] >= 0
+		|	return[i] < 256
+		"""
+		if (self.seedEncodeChains is None):
+			self.seedEncodeChains = self.getSeedChains(self.encodeChains)
+		encoded = (int.from_bytes(plain, "little") ^ self.roundKeys[round] ^ self.seedKey).to_bytes(256, "little")
+		encoded = bytes(map(bytes.__getitem__, self.seedEncodeChains, encoded))
+		return self.pBox.encode(encoded, pSeed)
+
+	def decodeRound(self, encoded:bytes, round:int, pSeed:int) -> bytes:
+		"""
+		Decodes a block of encoded numbers.
+		
+		Parameters:
+			encoded: block of encoded numbers
+			round: iteration of decode
+			pSeed: seed for PBox
+		
+		Returns:
+			block of decoded numbers
+			
+		| **Pre:**
+		|	len(encoded) == 256
+		|	encoded[i] >= 0
+		|	encoded[i] < 256
+		|	round >= 0
+		|	round < 8
+		|	pSeed >= 0
+		|	pSeed < 256
+			
+		| **Post:**
+		|	len(return) == 256
+		|	return[i] >= 0
+		|	return[i] < 256
+		"""
+		if (self.seedDecodeChains is None):
+			self.seedDecodeChains = self.getSeedChains(self.decodeChains)
+		decoded = self.pBox.decode(encoded, pSeed)
+		decoded = bytes(map(bytes.__getitem__, self.seedDecodeChains, decoded))
+		return (int.from_bytes(decoded, "little") ^ self.roundKeys[round] ^ self.seedKey).to_bytes(256, "little")
+
+	def encodeRounds(self, plain:bytes) -> bytes:#TODO rename to encode
+		"""
+		Encodes a block of plain numbers.
+		
+		Parameters:
+			plain: block of plain numbers
+		
+		Returns:
+			block of encoded numbers
+			
+		| **Pre:**
+		|	len(plain) == 256
+		|	plain[i] >= 0
+		|	plain[i] < 256
+			
+		| **Post:**
+		|	len(return) == 256
+		|	return[i] >= 0
+		|	return[i] < 256
+			
+		| **Modifies:**
+		|	self.seed[i]
+		"""
+		encoded = self.encodeRound(plain, 0, self.pSeed)
+		for i in range(7):
+			encoded = self.encodeRound(encoded, i+1, self.pSeed)
+		self.setSeed((int.from_bytes(plain, "little") ^ self.seedKey).to_bytes(256, "little").translate(SPBox.zeroToOne))
+		return encoded
+
+	def decodeRounds(self, encoded:bytes) -> bytes:#TODO rename to decode
+		"""
+		Decodes a block of encoded numbers.
+		
+		Parameters:
+			encoded: block of encoded numbers
+		
+		Returns:
+			block of decoded numbers
+			
+		| **Pre:**
+		|	len(encoded) == 256
+		|	encoded[i] >= 0
+		|	encoded[i] < 256
+			
+		| **Post:**
+		|	len(return) == 256
+		|	return[i] >= 0
+		|	return[i] < 256
+			
+		| **Modifies:**
+		|	self.seed[i]
+		"""
+		decoded = self.decodeRound(encoded, 7, self.pSeed)
+		for invertedI in range(7):
+			i = 6-invertedI
+			decoded = self.decodeRound(decoded, i, self.pSeed)
+		self.setSeed((int.from_bytes(decoded, "little") ^ self.seedKey).to_bytes(256, "little").translate(SPBox.zeroToOne))
+		return decoded
+
+	def encodeBlocks(self, plain, out):
+		"""
+		Encodes consecutive blocks of plain numbers into a preallocated buffer.
+		
+		Parameters:
+			plain (bytes, bytearray or memoryview): blocks of plain numbers
+			out (bytearray or memoryview): buffer receiving the blocks of encoded numbers
+			
+		| **Pre:**
+		|	len(plain) % 256 == 0
+		|	len(out) >= len(plain)
+			
+		| **Post:**
+		|	out[0:len(plain)] contains the encoded blocks
+			
+		| **Modifies:**
+		|	self.seed[i]
+		|	out[i]
+			
+		Note:
+			plain and out may be the same buffer.
+		"""
+		plain = memoryview(plain)
+		out = memoryview(out)
+		for offset in range(0, len(plain), 256):
+			out[offset:offset+256] = self.encodeRounds(plain[offset:offset+256])
+
+	def decodeBlocks(self, encoded, out):
+		"""
+		Decodes consecutive blocks of encoded numbers into a preallocated buffer.
+		
+		Parameters:
+			encoded (bytes, bytearray or memoryview): blocks of encoded numbers
+			out (bytearray or memoryview): buffer receiving the blocks of decoded numbers
+			
+		| **Pre:**
+		|	len(encoded) % 256 == 0
+		|	len(out) >= len(encoded)
+			
+		| **Post:**
+		|	out[0:len(encoded)] contains the decoded blocks
+			
+		| **Modifies:**
+		|	self.seed[i]
+		|	out[i]
+			
+		Note:
+			encoded and out may be the same buffer.
+		"""
+		encoded = memoryview(encoded)
+		out = memoryview(out)
+		for offset in range(0, len(encoded), 256):
+			out[offset:offset+256] = self.decodeRounds(encoded[offset:offset+256])
+
+	def getSeed(self):
+		"""
+		Gets the seed.
+		
+		Returns:
+			list: block of seed numbers
+			
+		| **Post:**
+		|	len(return) == 256
+		|	isinstance(return[i], int)
+		|	return[i] >= 1
+		|	return[i] < 256
+		"""
+		return list(self.seed)
+
+	def setSeed(self, seed):
+		"""
+		Sets the seed.
+		
+		Parameters:
+			seed (list): block of seed numbers
+			
+		| **Pre:**
+		|	len(seed) == 256
+		|	isinstance(seed[i], int)
+		|	seed[i] >= 1
+		|	seed[i] < 256
+			
+		| **Modifies:**
+		|	self.seed[i]
+		|	self.seedKey
+		|	self.pSeed
+		|	self.seedEncodeChains
+		|	self.seedDecodeChains
+		"""
+		self.seed:bytes = bytes(seed)
+		self.seedKey:int = int.from_bytes(self.seed, "little")
+		self.pSeed:int = sum(self.seed)%256
+		self.seedEncodeChains:List[bytes] = None
+		self.seedDecodeChains:List[bytes] = None
+#TODO change general parameter policy: all parameters may be edited by functions, no deepcopy needed
+class Edoc:
+	"""
+	"""
+	def __init__(self, pw, segmentSize=64*1024*1024, jobs=1, codec="lzw", level=None, useMmap=False, writeBehind=False, fsync=False, solid=False, index=False, progress=None):
+		"""
+		"""
+		self.pw = pw
+		if (progress is None):
+			progress = ProgressReporter()
+		self.progress = progress
+		self.solid = solid
+		self.index = index
+		self.useMmap = useMmap
+		self.writeBehind = writeBehind
+		self.fsync = fsync
+		self.writeSize = 1024*1024
+		self.codec = codec
+		self.level = level
+		self.probeSize = 64*1024
+		self.maxEntropy = 7.5
+		self.segmentSize = segmentSize+(-segmentSize)%256
+		self.jobs = jobs
+		self.executor = None
+		self.readSize = 1024*1024
+		asInt = []
+		for i in range(len(pw)):
+			asInt.append(ord(pw[i]))
+		pwIndex = 0
+		while (len(asInt) < 4096):
+			asInt.append(ord(pw[pwIndex%len(pw)]))
+			pwIndex += 1
+		self.spBox = SPBox(asInt)
+		self.blockBufferSize = 256*256
+	def encodeString(self, plain):
+		"""
+		"""
+		length = len(plain)
+		plainMessage = bytearray(length+(-length)%256)
+		for i in range(length):
+			if (ord(plain[i]) > 255):
+				plainMessage[i] = ord("?"[0])
+				logger.info(str(ord(plain[i]))+" is no valid char")
+			else:
+				plainMessage[i] = ord(plain[i])
+		for i in range(length, len(plainMessage)):
+			plainMessage[i] = randint(0, 255)
+		self.spBox.encodeBlocks(plainMessage, plainMessage)
+		return bytes(plainMessage)
+	def decodeString(self, encoded, length):
+		"""
+		"""
+		decoded = bytearray(len(encoded))
+		self.spBox.decodeBlocks(encoded, decoded)
+		return decoded[:length].decode("latin-1")
+	def encode(self, plain):
+		"""
+		"""
+		seed = [0]*256
+		for i in range(256):
+			seed[i] = randint(1, 255)
+		self.spBox.setSeed(seed)
+		return {"seed":seed,"length":len(plain),"message":self.encodeString(plain)}
+	def decode(self, container):
+		"""
+		"""
+		seed = container["seed"]
+		encoded = container["message"]
+		self.spBox.setSeed(seed)
+		return self.decodeString(encoded, container["length"])
+	def encodeFile(self, inFile, outFile):
+		"""
+		"""
+		codec = self.selectCodec(inFile)
+		fOut = self.getWriteBuffer(outFile)
+		size = getSize(inFile)
+		self.progress.begin(size)
+		if (self.segmentSize > 0):
+			fOut.write(bytes([2, codec.id]))
+		else:
+			fOut.write(bytes([0]))
+		self.encodeFileStream(inFile, fOut, codec)
+		self.shutdownExecutor()
+		self.logSpeed(size)
+		fOut.close()
+	def selectCodec(self, inFile):
+		"""
+		Selects the codec for a file.
+		Codec "auto" stores files uncompressed if the entropy of their first
+		self.probeSize bytes exceeds self.maxEntropy and uses zlib otherwise.
+		Containers without segments can only use lzw.
+		
+		Parameters:
+			inFile (string): path to file
+		
+		Returns:
+			Codec: codec
+		"""
+		if (self.segmentSize == 0):
+			return codecs[0]
+		if (self.codec != "auto"):
+			return getCodec(self.codec)
+		with open(inFile, "rb") as fIn:
+			return self.probeCodec(fIn.read(self.probeSize))
+	def probeCodec(self, data):
+		"""
+		Selects the codec "auto" stands for by the first bytes of a stream.
+		
+		Parameters:
+			data (bytes): first self.probeSize bytes of the stream
+		
+		Returns:
+			Codec: none if the entropy of data exceeds self.maxEntropy, zlib otherwise
+		"""
+		if (len(data) > 0 and getEntropy(data) > self.maxEntropy):
+			return getCodec("none")
+		return getCodec("zlib")
+	def encodeFileStream(self, inFile, fOut, codec=None):
+		"""
+		Compresses and encodes a file in a single pass.
+		
+		Parameters:
+			inFile (string): path to file
+			fOut (file): seekable file the stream is appended to
+			codec (Codec): compression, None to encode the file as it is
+		
+		Returns:
+			int: number of compressed bytes in the stream
+		"""
+		readBuffer = ReadBuffer(inFile, self.readSize, self.useMmap)
+		length = self.encodeChunks(iter(lambda: readBuffer.read(self.readSize), b""), fOut, codec)
+		readBuffer.close()
+		return length
+	def encodeChunks(self, chunks, fOut, codec=None):
+		"""
+		Compresses and encodes chunks of data into a single stream.
+		
+		Parameters:
+			chunks (iterable): bytes-like chunks of the data
+			fOut (file): seekable file the stream is appended to
+			codec (Codec): compression, None to encode the data as it is
+		
+		Returns:
+			int: number of compressed bytes in the stream
+		"""
+		compressor = LibraryCompressor()
+		if (codec is not None):
+			compressor = codec.getCompressor(self.level)
+		encoder = Encoder(self, fOut, self.segmentSize)
+		for data in chunks:
+			encoder.write(compressor.compress(data))
+			self.progress.add(len(data))
+		encoder.write(compressor.close())
+		encoder.close()
+		return encoder.length
+	def encodeSegment(self, data) -> bytearray:
+		"""
+		Encodes a whole segment with a fresh seed.
+		
+		Parameters:
+			data (bytes): plain numbers of the segment
+		
+		Returns:
+			bytearray: seed followed by the encoded blocks
+		"""
+		seed = [1]*256
 		for i in range(256):
-			self.seed[i] = plain[i] ^ self.seed[i]
-			if (self.seed[i] == 0):
-				self.seed[i] = 1
+			seed[i] = randint(1, 255)
+		self.spBox.setSeed(seed)
+		padded = len(data)+(-len(data))%256
+		encoded = bytearray(256+padded)
+		encoded[:256] = self.spBox.seed
+		encoded[256:256+len(data)] = data
+		for i in range(256+len(data), len(encoded)):
+			encoded[i] = randint(0, 255)
+		view = memoryview(encoded)[256:]
+		self.spBox.encodeBlocks(view, view)
 		return encoded
-
-	def decodeRounds(self, encoded:List[int]) -> List[int]:#TODO rename to decode
+	def decodeSegment(self, encoded, length) -> bytearray:
+		"""
+		Decodes a whole segment.
+		
+		Parameters:
+			encoded (bytes): seed followed by the encoded blocks
+			length (int): number of plain numbers
+		
+		Returns:
+			bytearray: plain numbers
+		"""
+		self.spBox.setSeed(encoded[:256])
+		decoded = bytearray(len(encoded)-256)
+		self.spBox.decodeBlocks(memoryview(encoded)[256:], decoded)
+		del decoded[length:]
+		return decoded
+	def getExecutor(self):
+		"""
+		Gets the process pool, which is created on first use.
+		
+		Returns:
+			ProcessPoolExecutor: pool of self.jobs processes
+		"""
+		if (self.executor is None):
+			self.executor = ProcessPoolExecutor(self.jobs, initializer=initWorker, initargs=(self.pw, self.segmentSize, self.level, self.fsync))
+		return self.executor
+	def getWriteBuffer(self, outFile):
+		"""
+		Opens a file for writing with the configured buffering.
+		
+		Parameters:
+			outFile (string): path to file
+		
+		Returns:
+			WriteBuffer: buffer of self.writeSize bytes, written by a background thread if self.writeBehind
+		"""
+		return WriteBuffer(outFile, self.writeSize, self.writeBehind, fsync=self.fsync)
+	def shutdownExecutor(self):
+		"""
+		Shuts the process pool down if it was created.
+		"""
+		if (self.executor is not None):
+			self.executor.shutdown()
+			self.executor = None
+	def logSpeed(self, size):
+		"""
+		Finishes the progress report of a task and logs its throughput.
+		
+		Parameters:
+			size (int): number of bytes of the task
+		"""
+		self.progress.finish()
+		logger.info(str(round(size/max(self.progress.elapsed(), 1e-9)))+" B/s")
+	def decodeFile(self, inFile, outFile):
+		"""
+		"""
+		fIn = ReadBuffer(inFile, self.readSize, self.useMmap)
+		fileType = fIn.read(1)[0]#0 or 2
+		size = getSize(inFile)
+		self.progress.begin(size)
+		codec = codecs[0]
+		if (fileType == 2):
+			codec = codecs[fIn.read(1)[0]]
+		writer = DecompressWriter(codec.getDecompressor(), self.getWriteBuffer(outFile))
+		self.decodeFileStream(fIn, writer, fileType == 2)
+		writer.close()
+		self.shutdownExecutor()
+		self.logSpeed(size)
+		fIn.close()
+		os.remove(inFile)
+	def decodeFileStream(self, fIn, fOut, segmented=False):
+		"""
+		Decodes a stream written by encodeFileStream.
+		
+		Parameters:
+			fIn (file): file positioned at the start of the stream
+			fOut (file): file or DecompressWriter the plain numbers are written to
+			segmented (bool): whether the stream has segments
+		"""
+		decoder = Decoder(self, fIn, segmented)
+		while (True):
+			data = decoder.read()
+			if (len(data) == 0):
+				break
+			fOut.write(data)
+			self.progress.add(len(data))
+		decoder.close()
+	def encodeFolder(self, folder, outFile):
+		"""
+		"""
+		fOut = self.getWriteBuffer(outFile)
+		manifest = scanFolder(folder)
+		size = sum(size for name, size in manifest)
+		self.progress.begin(size)
+		if (self.solid and self.segmentSize > 0):
+			self.encodeSolidStream(folder, manifest, fOut)
+		elif (self.index and self.segmentSize > 0):
+			fOut.write(bytes([5]))
+			entries = []
+			self.encodeFolderStream(folder, manifest, fOut, entries)
+			fOut.write(bytes(2))
+			writeIndex(fOut, entries)
+		else:
+			if (self.segmentSize > 0):
+				fOut.write(bytes([3]))
+			else:
+				fOut.write(bytes([1]))
+			self.encodeFolderStream(folder, manifest, fOut)
+		self.shutdownExecutor()
+		self.logSpeed(size)
+		fOut.close()
+		shutil.rmtree(folder)
+	def encodeSolidStream(self, folder, manifest, fOut):
+		"""
+		Writes a solid archive: all files of the folder are joined by an Archiver
+		and run through a single compressor and a single segmented stream.
+		Codec "auto" is selected by the beginning of the archive.
+		
+		Parameters:
+			folder (string): path to folder
+			manifest (list): files of the folder as returned by scanFolder
+			fOut (file): seekable file the archive is appended to
+		"""
+		archiver = Archiver(folder, readSize=self.readSize, manifest=manifest)
+		first = archiver.read()
+		codec = self.probeCodec(first[:self.probeSize]) if self.codec == "auto" else getCodec(self.codec)
+		fOut.write(bytes([4, codec.id]))
+		self.encodeChunks(itertools.chain([first], iter(archiver.read, b"")), fOut, codec)
+		archiver.close()
+	def encodeFolderStream(self, folder, manifest, fOut, entries=None):
+		"""
+		Writes the entries of all files of a folder.
+		With more than one job, files fitting into a single segment are compressed and
+		encoded as a whole by the process pool and written in order as they are finished,
+		larger files are encoded segment by segment by the process pool.
+		
+		Parameters:
+			folder (string): path to folder
+			manifest (list): files of the folder as returned by scanFolder
+			fOut (file): seekable file the entries are appended to
+			entries (list): receives an index entry per file, None to skip the index
+		"""
+		pending = deque()
+		for fileName, size in manifest:
+			file = folder+"/"+fileName
+			codec = self.selectCodec(file)
+			if (self.jobs > 1 and self.segmentSize > 0 and size <= self.segmentSize):
+				pending.append((fileName, codec, size, self.getExecutor().submit(encodeFolderFile, file, codec.id)))
+				if (len(pending) > self.jobs):
+					self.writeFolderFile(fOut, entries, *pending.popleft())
+				continue
+			while (len(pending) > 0):
+				self.writeFolderFile(fOut, entries, *pending.popleft())
+			self.writeFolderHeader(fOut, fileName, codec)
+			offset = fOut.tell()
+			length = self.encodeFileStream(file, fOut, codec)
+			if (entries is not None):
+				entries.append((fileName, codec.id, offset, size, length))
+		while (len(pending) > 0):
+			self.writeFolderFile(fOut, entries, *pending.popleft())
+	def writeFolderHeader(self, fOut, fileName, codec):
+		"""
+		Writes the header of an entry of a folder.
+		
+		Parameters:
+			fOut (file): file the header is appended to
+			fileName (string): path of the file relative to the folder
+			codec (Codec): compression of the file, ignored without segments
+		"""
+		if (self.segmentSize > 0):
+			fileName = fileName.encode("utf-8")
+			fOut.write(len(fileName).to_bytes(2, "big"))
+			fOut.write(fileName)
+			fOut.write(bytes([codec.id]))
+		else:
+			fileName += ".compressed"
+			ba = bytearray()
+			ba.append(len(fileName))
+			for c in fileName:
+				ba.append(ord(c))
+			fOut.write(ba)
+	def writeFolderFile(self, fOut, entries, fileName, codec, size, future):
+		"""
+		Writes an entry of a folder encoded by the process pool.
+		
+		Parameters:
+			fOut (file): file the entry is appended to
+			entries (list): receives an index entry, None to skip the index
+			fileName (string): path of the file relative to the folder
+			codec (Codec): compression of the file
+			size (int): size of the file
+			future (Future): result of encodeFolderFile
+		"""
+		stream, length = future.result()
+		self.writeFolderHeader(fOut, fileName, codec)
+		if (entries is not None):
+			entries.append((fileName, codec.id, fOut.tell(), size, length))
+		fOut.write(stream)
+		self.progress.add(size)
+	def decodeFolder(self, inFile):
+		"""
+		"""
+		fIn = ReadBuffer(inFile, self.readSize, self.useMmap)
+		folder = inFile[0:inFile.rfind(".")] + "/"
+		fileType = fIn.read(1)[0]#1, 3, 4 or 5
+		size = getSize(inFile)
+		self.progress.begin(size)
+		if (fileType == 4):
+			codec = codecs[fIn.read(1)[0]]
+			writer = DecompressWriter(codec.getDecompressor(), Dearchiver(folder, self.getWriteBuffer))
+			self.decodeFileStream(fIn, writer, True)
+			writer.close()
+		else:
+			self.decodeFolderStream(fIn, folder, fileType in (3, 5))
+		self.shutdownExecutor()
+		self.logSpeed(size)
+		fIn.close()
+		os.remove(inFile)
+	def decodeFolderStream(self, fIn, root, segmented=False):
+		"""
+		Restores the files of a folder.
+		With more than one job, segmented files consisting of a single segment are decoded
+		and decompressed as a whole by the process pool, larger files are decoded segment
+		by segment by the process pool.
+		
+		Parameters:
+			fIn (ReadBuffer): archive positioned behind the type
+			root (string): path of the restored folder
+			segmented (bool): whether the entries have segments
+			
+		Raises:
+			ValueError: the path of an entry leaves the folder
+		"""
+		pending = deque()
+		while True:
+			if (segmented):
+				lengthStr = fIn.read(2)
+				if (len(lengthStr) == 0 or lengthStr == bytes(2)):#end of the file or start of the index
+					break
+				name = bytes(fIn.read(int.from_bytes(lengthStr, "big"))).decode("utf-8")
+				outFile = checkPath(root, name)
+				codec = codecs[fIn.read(1)[0]]
+				if (self.jobs > 1):
+					offset = fIn.tell()
+					decoder = Decoder(self, fIn, True)
+					if (len(decoder.segments) <= 1):
+						decoder.close()
+						pending.append((decoder.end-offset, self.getExecutor().submit(decodeFolderFile, fIn.name, offset, codec.id, outFile)))
+						if (len(pending) > self.jobs):
+							length, future = pending.popleft()
+							future.result()
+							self.progress.add(length)
+						continue
+					fIn.seek(offset)
+			else:
+				codec = codecs[0]
+				lengthStr = fIn.read(1)
+				if (len(lengthStr) == 0):
+					break
+				length = lengthStr[0]
+				data = fIn.read(length)
+				name = ""
+				for c in data:
+					name += chr(c)
+				name = name[:-11]
+				outFile = checkPath(root, name)
+			writer = DecompressWriter(codec.getDecompressor(), self.getWriteBuffer(outFile))
+			self.decodeFileStream(fIn, writer, segmented)
+			writer.close()
+		while (len(pending) > 0):
+			length, future = pending.popleft()
+			future.result()
+			self.progress.add(length)
+	def extractFile(self, inFile, path):
+		"""
+		Decodes a single file of a folder archive written with an index.
+		The archive is kept, the file is restored to the folder decodeFolder restores to.
+		
+		Parameters:
+			inFile (string): path to the archive
+			path (string): path of the file within the archive
+			
+		Raises:
+			KeyError: path is not in the index
+			ValueError: the path in the index leaves the folder
+		"""
+		fIn = ReadBuffer(inFile, self.readSize, self.useMmap)
+		entries = {entry[0]: entry for entry in readIndex(fIn)}
+		name, codecId, offset, size, length = entries[path]
+		outFile = checkPath(inFile[0:inFile.rfind(".")], name)
+		self.progress.begin(length)
+		fIn.seek(offset)
+		writer = DecompressWriter(codecs[codecId].getDecompressor(), self.getWriteBuffer(outFile))
+		self.decodeFileStream(fIn, writer, True)
+		writer.close()
+		self.shutdownExecutor()
+		self.logSpeed(length)
+		fIn.close()
+def writeIndex(fOut, entries):
+	"""
+	Appends the index of a folder archive.
+	Every entry is stored as
+	[2 bytes length of the path][utf-8 path][codec id][8 bytes offset of the stream][8 bytes size][8 bytes compressed size],
+	followed by the 8 bytes offset of the index.
+	
+	Parameters:
+		fOut (file): seekable file positioned behind the last entry of the archive
+		entries (list): (path, codec id, offset, size, compressed size) per file
+	"""
+	start = fOut.tell()
+	for name, codecId, offset, size, length in entries:
+		name = name.encode("utf-8")
+		fOut.write(len(name).to_bytes(2, "big"))
+		fOut.write(name)
+		fOut.write(bytes([codecId]))
+		fOut.write(offset.to_bytes(8, "big"))
+		fOut.write(size.to_bytes(8, "big"))
+		fOut.write(length.to_bytes(8, "big"))
+	fOut.write(start.to_bytes(8, "big"))
+def readIndex(fIn) -> list:
+	"""
+	Reads the index of a folder archive.
+	
+	Parameters:
+		fIn (ReadBuffer): archive
+	
+	Returns:
+		list: (path, codec id, offset, size, compressed size) per file
+		
+	Raises:
+		ValueError: the archive has no index
+	"""
+	fIn.seek(0)
+	if (fIn.read(1)[0] != 5):
+		raise ValueError(fIn.name+" has no index")
+	end = fIn.filesize-8
+	fIn.seek(end)
+	fIn.seek(int.from_bytes(fIn.read(8), "big"))
+	entries = []
+	while (fIn.tell() < end):
+		name = bytes(fIn.read(int.from_bytes(fIn.read(2), "big"))).decode("utf-8")
+		codecId = fIn.read(1)[0]
+		offset = int.from_bytes(fIn.read(8), "big")
+		size = int.from_bytes(fIn.read(8), "big")
+		length = int.from_bytes(fIn.read(8), "big")
+		entries.append((name, codecId, offset, size, length))
+	return entries
+class ProgressReporter:
+	"""
+	ProgressReporter reports the progress and the estimated remaining time to a sink.
+	Loops only add to a counter, the clock is read every checkSize bytes and the sink
+	is updated at most rate times per second.
+		
+	Attributes:
+		sink (ProgressSink): receives the updates
+		interval (float): minimum number of seconds between two updates
+		checkSize (int): number of bytes between two readings of the clock
+		total (int): number of bytes expected in total
+		done (int): number of bytes processed so far
+		start (float): time begin() was called
+		nextCheck (int): value of self.done the clock is read at next
+		nextUpdate (float): time the sink may be updated at next
+		
+	Parameters:
+		sink (ProgressSink): receives the updates, None to report nothing
+		rate (float): maximum number of updates per second
+		checkSize (int): number of bytes between two readings of the clock
+	"""
+	def __init__(self, sink=None, rate=10, checkSize=1024*1024):
+		if (sink is None):
+			sink = ProgressSink()
+		self.sink = sink
+		self.interval = 1/rate
+		self.checkSize = checkSize
+		self.total = 0
+		self.done = 0
+		self.start = time.monotonic()
+		self.nextCheck = 0
+		self.nextUpdate = self.start
+	def begin(self, total):
+		"""
+		Starts reporting a new task.
+		
+		Parameters:
+			total (int): number of bytes expected in total
+		"""
+		self.total = total
+		self.done = 0
+		self.start = time.monotonic()
+		self.nextCheck = 0
+		self.nextUpdate = self.start
+		self.add(0)
+	def add(self, size):
+		"""
+		Counts processed bytes.
+		
+		Parameters:
+			size (int): number of bytes processed since the last call
+			
+		| **Modifies:**
+		|	self.done
+		"""
+		self.done += size
+		if (self.done >= self.nextCheck):
+			self.nextCheck = self.done+self.checkSize
+			now = time.monotonic()
+			if (now >= self.nextUpdate):
+				self.nextUpdate = now+self.interval
+				self.report(now)
+	def finish(self):
+		"""
+		Reports the final state of the task.
+		"""
+		self.report(time.monotonic())
+		self.sink.finish()
+	def elapsed(self) -> float:
+		"""
+		Gets the duration of the task.
+		
+		Returns:
+			float: seconds since begin()
+		"""
+		return time.monotonic()-self.start
+	def report(self, now):
+		"""
+		Hands the current state to the sink.
+		
+		Parameters:
+			now (float): current time
+		"""
+		elapsed = now-self.start
+		remaining = 0
+		if (self.done != 0):
+			remaining = max(0, self.total*elapsed/self.done-elapsed)
+		self.sink.update(self.done, self.total, elapsed, remaining)
+class ProgressSink:
+	"""
+	ProgressSink displays progress updates, the base class displays nothing.
+	"""
+	def update(self, done, total, elapsed, remaining):
+		"""
+		Displays the state of a task.
+		
+		Parameters:
+			done (int): number of bytes processed so far
+			total (int): number of bytes expected in total
+			elapsed (float): seconds since the task started
+			remaining (float): estimated seconds until the task is finished
+		"""
+		pass
+	def finish(self):
+		"""
+		Ends the display of a task.
+		"""
+		pass
+	def format(self, done, total, remaining) -> str:
+		"""
+		Formats the state of a task as percentage and remaining time.
+		
+		Parameters:
+			done (int): number of bytes processed so far
+			total (int): number of bytes expected in total
+			remaining (float): estimated seconds until the task is finished
+		
+		Returns:
+			string: e.g. "42.0% 00:01:30"
+		"""
+		h = math.floor(remaining/3600)
+		m = math.floor((remaining-h*3600)/60)
+		s = math.floor(remaining-h*3600-m*60)
+		return str(round(done*1000/max(1, total))/10)+"% "+str(h).zfill(2)+":"+str(m).zfill(2)+":"+str(s).zfill(2)
+class TerminalSink(ProgressSink):
+	"""
+	TerminalSink overwrites a single line of a terminal.
+		
+	Attributes:
+		stream (file): text stream of the terminal
+		
+	Parameters:
+		stream (file): text stream of the terminal, None for sys.stdout
+	"""
+	def __init__(self, stream=None):
+		self.stream = stream
+	def update(self, done, total, elapsed, remaining):
+		print(self.format(done, total, remaining), end="\r", file=self.stream or sys.stdout, flush=True)
+	def finish(self):
+		print(file=self.stream or sys.stdout)
+class CursesSink(ProgressSink):
+	"""
+	CursesSink writes the progress into the first line of a curses window.
+		
+	Attributes:
+		window: curses window
+		
+	Parameters:
+		window: curses window
+	"""
+	def __init__(self, window):
+		self.window = window
+	def update(self, done, total, elapsed, remaining):
+		self.window.move(0, 0)
+		self.window.clrtoeol()
+		self.window.addstr(0, 0, self.format(done, total, remaining))
+		self.window.refresh()
+class JSONSink(ProgressSink):
+	"""
+	JSONSink writes every update as a line of JSON, e.g. for a GUI reading the output.
+		
+	Attributes:
+		stream (file): text stream the lines are written to
+		
+	Parameters:
+		stream (file): text stream the lines are written to, None for sys.stdout
+	"""
+	def __init__(self, stream=None):
+		self.stream = stream
+	def update(self, done, total, elapsed, remaining):
+		stream = self.stream or sys.stdout
+		stream.write(json.dumps({"done":done,"total":total,"elapsed":round(elapsed, 3),"remaining":round(remaining, 3)})+"\n")
+		stream.flush()
+progressSinks:List[str] = ["tty", "curses", "json", "none"]
+def getProgressSink(name, window=None):
+	"""
+	Creates a progress sink by its name.
+	
+	Parameters:
+		name (string): one of progressSinks
+		window: curses window, required by "curses"
+	
+	Returns:
+		ProgressSink: sink
+	"""
+	if (name == "tty"):
+		return TerminalSink()
+	if (name == "curses"):
+		return CursesSink(window)
+	if (name == "json"):
+		return JSONSink()
+	if (name == "none"):
+		return ProgressSink()
+	raise ValueError("unknown progress sink "+name)
+def getSyntheticData(size, entropy) -> bytes:
+	"""
+	Creates random data with a given entropy.
+	
+	Parameters:
+		size (int): number of bytes
+		entropy (float): bits per byte, 0 <= entropy <= 8
+	
+	Returns:
+		bytes: numbers drawn uniformly from an alphabet of round(2**entropy) numbers
+	"""
+	alphabetSize = max(1, min(256, round(2**entropy)))
+	return os.urandom(size).translate(bytes(i%alphabetSize for i in range(256)))
+class Benchmark:
+	"""
+	Benchmark measures the throughput of the stages of Edoc on synthetic data.
+	Every stage processes self.data and reports the best of self.repeat runs.
+		
+	Attributes:
+		edoc (Edoc): provides the SPBox and the configuration of the end-to-end stages
+		data (bytes): synthetic plain numbers
+		entropy (float): bits per byte of self.data
+		repeat (int): number of runs per stage
+		stages (list): (name, function) per stage, the function gets a temporary folder and returns the measured seconds
+		
+	Parameters:
+		edoc (Edoc): provides the SPBox and the configuration of the end-to-end stages
+		size (int): number of bytes processed per stage
+		entropy (float): bits per byte of the synthetic data
+		repeat (int): number of runs per stage
+	"""
+	def __init__(self, edoc, size=1024*1024, entropy=4.0, repeat=1):
+		self.edoc = edoc
+		self.data = getSyntheticData(size, entropy)
+		self.entropy = entropy
+		self.repeat = repeat
+		self.stages = [
+			("SBox.encode", lambda folder: self.benchSBox(False)),
+			("SBox.decode", lambda folder: self.benchSBox(True)),
+			("PBox.encode", lambda folder: self.benchPBox(False)),
+			("PBox.decode", lambda folder: self.benchPBox(True)),
+			("SPBox.encodeRounds", lambda folder: self.benchRounds(False)),
+			("SPBox.decodeRounds", lambda folder: self.benchRounds(True)),
+			("SPBox.encodeBlocks", lambda folder: self.benchBlocks(False)),
+			("SPBox.decodeBlocks", lambda folder: self.benchBlocks(True)),
+		]
+		for codec in codecs:
+			self.stages.append(("compress."+codec.name, lambda folder, codec=codec: self.benchCodec(codec, False)))
+			self.stages.append(("decompress."+codec.name, lambda folder, codec=codec: self.benchCodec(codec, True)))
+		self.stages += [
+			("ReadBuffer", lambda folder: self.benchReadBuffer(folder, False)),
+			("ReadBuffer.mmap", lambda folder: self.benchReadBuffer(folder, True)),
+			("WriteBuffer", lambda folder: self.benchWriteBuffer(folder, False)),
+			("WriteBuffer.writeBehind", lambda folder: self.benchWriteBuffer(folder, True)),
+			("Edoc.encodeFile", lambda folder: self.benchFile(folder, False)),
+			("Edoc.decodeFile", lambda folder: self.benchFile(folder, True)),
+			("Edoc.encodeFolder", lambda folder: self.benchFolder(folder, False)),
+			("Edoc.decodeFolder", lambda folder: self.benchFolder(folder, True)),
+		]
+	def run(self, names=None) -> dict:
 		"""
-		Decodes a block of encoded numbers.
+		Runs the stages.
 		
 		Parameters:
-			encoded: block of encoded numbers
+			names (list): names of the stages to run, None for all
 		
 		Returns:
-			block of decoded numbers
-			
-		| **Pre:**
-		|	len(encoded) == 256
-		|	encoded[i] >= 0
-		|	encoded[i] < 256
-			
-		| **Post:**
-		|	len(return) == 256
-		|	return[i] >= 0
-		|	return[i] < 256
-			
-		| **Modifies:**
-		|	self.seed[i]
+			dict: configuration and a result per stage, ready to be dumped as JSON
 		"""
-		pSeed = 0
-		for i in range(256):
-			pSeed = (pSeed+self.seed[i])%256
-		decoded = self.decodeRound(encoded, 7, pSeed)
-		for invertedI in range(7):
-			i = 6-invertedI
-			decoded = self.decodeRound(decoded, i, pSeed)
-		for i in range(256):
-			self.seed[i] = decoded[i] ^ self.seed[i]
-			if (self.seed[i] == 0):
-				self.seed[i] = 1
-		return decoded
-
-	def encode(self, plain):#TODO remove
+		results = []
+		for name, stage in self.stages:
+			if (names is not None and name not in names):
+				continue
+			best = None
+			for i in range(self.repeat):
+				with tempfile.TemporaryDirectory() as folder:
+					seconds = stage(folder)
+				if (best is None or seconds < best):
+					best = seconds
+			results.append({"stage":name, "bytes":len(self.data), "seconds":round(best, 6), "bytesPerSecond":round(len(self.data)/max(best, 1e-9))})
+			logger.info(name+" "+str(results[-1]["bytesPerSecond"])+" B/s")
+		return {
+			"python":sys.version.split()[0],
+			"size":len(self.data),
+			"entropy":self.entropy,
+			"repeat":self.repeat,
+			"jobs":self.edoc.jobs,
+			"segmentSize":self.edoc.segmentSize,
+			"codec":self.edoc.codec,
+			"results":results,
+		}
+	def getBlocks(self) -> List[bytes]:
 		"""
-		Encodes a block of plain numbers.
-		
-		Parameters:
-			plain (list): block of plain numbers
+		Splits self.data into blocks of 256 numbers, the last block is padded with zeros.
 		
 		Returns:
-			{"length":length, "message":encodedNumbers}: container with encoded numbers
-			
-		| **Pre:**
-		|	len(plain) > 0
-		|	isinstance(plain[i], int)
-		|	plain[i] >= 0
-		|	plain[i] < 256
-			
-		| **Post:**
-		|	isinstance(return["message"], list)
-		|	len(return["message"]) >= return["length"]
-		|	len(return["message"]) % 256 == 0
-		|	isinstance(return["message"][i], int)
-		|	return["message"][i] >= 0
-		|	return["message"][i] < 256
-			
-		| **Modifies:**
-		|	self.seed[i]
+			list: blocks
 		"""
-		length = len(plain)
-		while (len(plain)%256 != 0):
-			plain.append(randint(0, 255))
-		encodedBytes = 0
-		encoded = []
-		while (encodedBytes < len(plain)):
-			plainPart = [0]*256
-			for i in range(256):
-				plainPart[i] = plain[encodedBytes]
-				encodedBytes += 1
-			encodedPart = self.encodeRounds(plainPart)
-			for i in range(256):
-				encoded.append(encodedPart[i])
-		return {"length":length, "message":encoded}
-
-	def decode(self, encodedJSON):#TODO remove
+		padded = self.data+bytes(-len(self.data)%256)
+		return [padded[i:i+256] for i in range(0, len(padded), 256)]
+	def benchSBox(self, decode) -> float:
 		"""
-		Decodes a container with encoded numbers.
+		Substitutes every number of self.data by the first SBox.
 		
 		Parameters:
-			encodedJSON ({"length":length, "message":encodedNumbers}): container with encoded numbers
+			decode (bool): whether SBox.decode is measured instead of SBox.encode
 		
 		Returns:
-			list: block of decoded numbers
-			
-		| **Pre:**
-		|	isinstance(encodedJSON["message"], list)
-		|	len(encodedJSON["message"]) >= encodedJSON["length"]
-		|	len(encodedJSON["message"]) % 256 == 0
-		|	isinstance(encodedJSON["message"][i], int)
-		|	encodedJSON["message"][i] >= 0
-		|	encodedJSON["message"][i] < 256
-			
-		| **Post:**
-		|	len(return) == encodedJSON["length"]
-		|	isinstance(return[i], int)
-		|	return[i] >= 0
-		|	return[i] < 256
-			
-		| **Modifies:**
-		|	self.seed[i]
+			float: seconds
 		"""
-		length = encodedJSON["length"]
-		encoded = encodedJSON["message"]
-		decodedBytes = 0
-		decoded = []
-		while (decodedBytes < len(encoded)):
-			encodedPart = [0]*256
-			for i in range(256):
-				encodedPart[i] = encoded[decodedBytes]
-				decodedBytes += 1
-			decodedPart = self.decodeRounds(encodedPart)
-			for i in range(256):
-				if (len(decoded) < length):
-					decoded.append(decodedPart[i])
-				else:
-					break
-		return decoded
-
-	def getSeed(self):
+		sBox = self.edoc.spBox.sBoxes[0]
+		function = sBox.decode if decode else sBox.encode
+		start = time.perf_counter()
+		for number in self.data:
+			function(number)
+		return time.perf_counter()-start
+	def benchPBox(self, decode) -> float:
 		"""
-		Gets the seed.
+		Permutes every block of self.data by the PBox.
+		
+		Parameters:
+			decode (bool): whether PBox.decode is measured instead of PBox.encode
 		
 		Returns:
-			list: block of seed numbers
-			
-		| **Post:**
-		|	len(return) == 256
-		|	isinstance(return[i], int)
-		|	return[i] >= 1
-		|	return[i] < 256
+			float: seconds
 		"""
-		seed = [0]*256
-		for i in range(256):
-			seed[i] = self.seed[i]
-		return seed
-
-	def setSeed(self, seed):
+		pBox = self.edoc.spBox.pBox
+		function = pBox.decode if decode else pBox.encode
+		blocks = self.getBlocks()
+		start = time.perf_counter()
+		for block in blocks:
+			function(block, 1)
+		return time.perf_counter()-start
+	def benchRounds(self, decode) -> float:
 		"""
-		Sets the seed.
+		Runs every block of self.data through SPBox.encodeRounds or SPBox.decodeRounds.
 		
 		Parameters:
-			seed (list): block of seed numbers
-			
-		| **Pre:**
-		|	len(seed) == 256
-		|	isinstance(seed[i], int)
-		|	seed[i] >= 1
-		|	seed[i] < 256
-			
-		| **Modifies:**
-		|	self.seed[i]
-		"""
-		for i in range(256):
-			self.seed[i] = seed[i]
-#TODO change general parameter policy: all parameters may be edited by functions, no deepcopy needed
-class Edoc:
-	"""
-	"""
-	def __init__(self, pw):
-		"""
-		"""
-		asInt = []
-		for i in range(len(pw)):
-			asInt.append(ord(pw[i]))
-		pwIndex = 0
-		while (len(asInt) < 4096):
-			asInt.append(ord(pw[pwIndex%len(pw)]))
-			pwIndex += 1
-		self.spBox = SPBox(asInt)
-	def encodeString(self, plain):
-		"""
-		"""
-		plainMessage = []
-		for i in range(len(plain)):
-			if (ord(plain[i]) > 255):
-				plainMessage[i] = ord("?"[0])
-				logger.info(ord(plain[i])+" is no valid char")
-			else:
-				plainMessage[i] = ord(plain[i])
-		return self.spBox.encode(plainMessage)
-	def decodeString(self, encoded):
-		"""
-		"""
-		decoded = self.spBox.decode(encoded)
-		decodedStr = ""
-		for i in range(len(decoded)):
-			decodedStr += chr(decoded[i])
-		return decodedStr
-	def encode(self, plain):
-		"""
+			decode (bool): whether decodeRounds is measured instead of encodeRounds
+		
+		Returns:
+			float: seconds
 		"""
-		seed = [0]*256
-		for i in range(256):
-			seed[i] = randint(1, 255)
-		self.spBox.setSeed(seed)
-		return {"seed":seed,"message":self.encodeString(plain)}
-	def decode(self, container):
+		spBox = self.edoc.spBox
+		function = spBox.decodeRounds if decode else spBox.encodeRounds
+		blocks = self.getBlocks()
+		spBox.setSeed([1]*256)
+		start = time.perf_counter()
+		for block in blocks:
+			function(block)
+		return time.perf_counter()-start
+	def benchBlocks(self, decode) -> float:
 		"""
+		Runs self.data through SPBox.encodeBlocks or SPBox.decodeBlocks at once.
+		
+		Parameters:
+			decode (bool): whether decodeBlocks is measured instead of encodeBlocks
+		
+		Returns:
+			float: seconds
 		"""
-		seed = container["seed"]
-		encoded = container["message"]
-		self.spBox.setSeed(seed)
-		return self.decodeString(encoded)
-	def encodeFile(self, inFile, outFile):
+		spBox = self.edoc.spBox
+		function = spBox.decodeBlocks if decode else spBox.encodeBlocks
+		padded = self.data+bytes(-len(self.data)%256)
+		out = bytearray(len(padded))
+		spBox.setSeed([1]*256)
+		start = time.perf_counter()
+		function(padded, out)
+		return time.perf_counter()-start
+	def benchCodec(self, codec, decompress) -> float:
 		"""
+		Compresses or decompresses self.data at once.
+		
+		Parameters:
+			codec (Codec): codec
+			decompress (bool): whether the decompressor is measured instead of the compressor
+		
+		Returns:
+			float: seconds
 		"""
-		compressor = Compressor()
-		compressor.compressFile(inFile, inFile+".compressed")
-		inFile = inFile+".compressed"
-		fOut = open(outFile, "wb")
-		fOut.write(chr(0).encode("utf-8"))
-		size = getSize(inFile)
-		self.encodeFileStream(inFile, fOut, size)
-		now = time.time()
-		logger.info(str(round(size/(now-start)))+" B/s")
-		fOut.close()
-		os.remove(inFile)
-	def encodeFileStream(self, inFile, fOut, targetProgress):#TODO use buffers
+		compressor = codec.getCompressor(self.edoc.level)
+		if (decompress):
+			compressed = compressor.compress(self.data)+compressor.close()
+			decompressor = codec.getDecompressor()
+			start = time.perf_counter()
+			decompressor.decompress(compressed)
+			decompressor.close()
+		else:
+			start = time.perf_counter()
+			compressor.compress(self.data)
+			compressor.close()
+		return time.perf_counter()-start
+	def benchReadBuffer(self, folder, useMmap) -> float:
 		"""
+		Reads self.data from a file in chunks of edoc.readSize.
+		
+		Parameters:
+			folder (string): path to a temporary folder
+			useMmap (bool): whether the file is mapped into memory
+		
+		Returns:
+			float: seconds
 		"""
-		global progress
-		seed = [1]*256
-		for i in range(256):
-			seed[i] = randint(1, 255)
-		self.spBox.setSeed(seed)
-		fIn = open(inFile, "rb")
-		ba = bytearray()
-		fileSize = os.stat(inFile).st_size
-		for i in range(8):
-			ba.append((fileSize >> (8*(8-1-i))) & 0xff)
-		fOut.write(ba)
-		ba = bytearray()
-		for i in range(256):
-			ba.append(self.spBox.seed[i])
-		fOut.write(ba)
-		readSize = 0
-		while readSize < fileSize:
-			now = time.time()
-			end = 0
-			if (progress != 0):
-				end = targetProgress*(float(now-start)/progress)
-				end -= (now-start)
-			h = math.floor(end/3600)
-			m = math.floor((end-h*3600)/60)
-			s = math.floor(end-h*3600-m*60)
-			h = str(h)
-			m = str(m)
-			s = str(s)
-			if (len(h) == 1):
-				h = "0"+h
-			if (len(m) == 1):
-				m = "0"+m
-			if (len(s) == 1):
-				s = "0"+s
-			end = round(end*10)/10
-			print(str(round(progress*1000/targetProgress)/10)+"% "+h+":"+m+":"+s, end="\r")
-			n = min(fileSize-readSize, 256)
-			progress += n
-			data = fIn.read(n)
-			asInt = []
-			for c in data:
-				asInt.append(c)
-			output = bytearray()
-			encoded = self.spBox.encode(asInt)
-			for i in range(256):
-				output.append(encoded["message"][i])
-			fOut.write(output)
-			readSize += n
-		fIn.close()
-	def decodeFile(self, inFile, outFile):
+		with open(folder+"/plain", "wb") as f:
+			f.write(self.data)
+		start = time.perf_counter()
+		readBuffer = ReadBuffer(folder+"/plain", self.edoc.readSize, useMmap)
+		while (len(readBuffer.read(self.edoc.readSize)) > 0):
+			pass
+		readBuffer.close()
+		return time.perf_counter()-start
+	def benchWriteBuffer(self, folder, writeBehind) -> float:
 		"""
+		Writes self.data to a file in chunks of 64 KiB.
+		
+		Parameters:
+			folder (string): path to a temporary folder
+			writeBehind (bool): whether a background thread writes the file
+		
+		Returns:
+			float: seconds
 		"""
-		outFile = outFile+".compressed"
-		fIn = open(inFile, "rb")
-		ord(fIn.read(1).decode("utf-8")[0])#0
-		size = getSize(inFile)
-		self.decodeFileStream(fIn, outFile, size)
-		now = time.time()
-		logger.info(str(round(size/(now-start)))+" B/s")
-		fIn.close()
-		os.remove(inFile)
-		compressor = Compressor()
-		compressor.decompressFile(outFile, outFile[:-11])
-	def decodeFileStream(self, fIn, outFile, targetProgress):#TODO use buffers
-		"""
-		"""
-		global progress
-		fOut = open(outFile, "wb")
-		fileSize = 0
-		for i in range(8):
-			fileSize += (fIn.read(1)[0]) << (8*(8-1-i))
-		seed = []
-		b = fIn.read(256)
-		for c in b:
-			seed.append(c)
-		self.spBox.setSeed(seed)
-		readSize = 0
-		while readSize < fileSize:
-			now = time.time()
-			end = 0
-			if (progress != 0):
-				end = targetProgress*(float(now-start)/progress)
-				end -= (now-start)
-			h = math.floor(end/3600)
-			m = math.floor((end-h*3600)/60)
-			s = math.floor(end-h*3600-m*60)
-			h = str(h)
-			m = str(m)
-			s = str(s)
-			if (len(h) == 1):
-				h = "0"+h
-			if (len(m) == 1):
-				m = "0"+m
-			if (len(s) == 1):
-				s = "0"+s
-			end = round(end*10)/10
-			print(str(round(progress*1000/targetProgress)/10)+"% "+h+":"+m+":"+s, end="\r")
-			length = min(fileSize-readSize, 256)
-			n = 256
-			progress += n
-			data = fIn.read(n)
-			message = []
-			for c in data:
-				message.append(c)
-			encoded = {"length":length,"message":message}
-			decoded = self.spBox.decode(encoded)
-			output = bytearray()
-			for c in decoded:
-				output.append(c)
-			fOut.write(output)
-			readSize += n
-		fOut.close()
-	def encodeFolder(self, folder, outFile):
+		view = memoryview(self.data)
+		start = time.perf_counter()
+		writeBuffer = WriteBuffer(folder+"/plain", self.edoc.writeSize, writeBehind, fsync=self.edoc.fsync)
+		for i in range(0, len(view), 64*1024):
+			writeBuffer.write(view[i:i+64*1024])
+		writeBuffer.close()
+		return time.perf_counter()-start
+	def benchFile(self, folder, decode) -> float:
 		"""
+		Encodes self.data as a file with edoc.encodeFile or restores it with edoc.decodeFile.
+		
+		Parameters:
+			folder (string): path to a temporary folder
+			decode (bool): whether decodeFile is measured instead of encodeFile
+		
+		Returns:
+			float: seconds
 		"""
-		fOut = open(outFile, "wb")
-		fOut.write(chr(1).encode("utf-8"))
-		size = getSize(folder)
-		self.encodeFolderStream(folder, fOut, folder+"/", size)
-		now = time.time()
-		logger.info(str(round(size/(now-start)))+" B/s")
-		fOut.close()
-		shutil.rmtree(folder)
-	def encodeFolderStream(self, folder, fOut, root, targetProgress):
-		"""
-		"""
-		files = os.listdir(folder)
-		for file in files:
-			file = folder + "/" + file
-			if (os.path.isfile(file)):
-				compressor = Compressor()
-				compressor.compressFile(file, file+".compressed")
-				file = file+".compressed"
-				fileName = file[len(root):]
-				ba = bytearray()
-				ba.append(len(fileName))
-				for c in fileName:
-					ba.append(ord(c))
-				fOut.write(ba)
-				self.encodeFileStream(file, fOut, targetProgress)
-			elif (os.path.isdir(file)):
-				self.encodeFolderStream(file, fOut, root, targetProgress)
-	def decodeFolder(self, inFile):
+		with open(folder+"/plain", "wb") as f:
+			f.write(self.data)
+		if (decode):
+			self.edoc.encodeFile(folder+"/plain", folder+"/plain.edoc")
+			os.remove(folder+"/plain")
+			start = time.perf_counter()
+			self.edoc.decodeFile(folder+"/plain.edoc", folder+"/plain")
+		else:
+			start = time.perf_counter()
+			self.edoc.encodeFile(folder+"/plain", folder+"/plain.edoc")
+		return time.perf_counter()-start
+	def writeFolder(self, folder):
 		"""
+		Splits self.data into files of 64 KiB in 8 subfolders.
+		
+		Parameters:
+			folder (string): path the folder is created at
 		"""
-		fIn = open(inFile, "rb")
-		folder = inFile[0:inFile.rfind(".")] + "/"
-		fIn.read(1)[0]#1
-		size = getSize(inFile)
-		self.decodeFolderStream(fIn, folder, size)
-		now = time.time()
-		logger.info(str(round(size/(now-start)))+" B/s")
-		fIn.close()
-		os.remove(inFile)
-	def decodeFolderStream(self, fIn, root, targetProgress):
+		for i in range(0, max(1, len(self.data)), 64*1024):
+			file = folder+"/"+str(i//(64*1024)%8)+"/"+str(i)
+			os.makedirs(os.path.dirname(file), exist_ok=True)
+			with open(file, "wb") as f:
+				f.write(self.data[i:i+64*1024])
+	def benchFolder(self, folder, decode) -> float:
 		"""
+		Encodes self.data as a folder with edoc.encodeFolder or restores it with edoc.decodeFolder.
+		
+		Parameters:
+			folder (string): path to a temporary folder
+			decode (bool): whether decodeFolder is measured instead of encodeFolder
+		
+		Returns:
+			float: seconds
 		"""
-		while True:
-			lengthStr = fIn.read(1)
-			if (len(lengthStr) == 0):
-				break
-			length = lengthStr[0]
-			data = fIn.read(length)
-			outFile = root
-			for c in data:
-				outFile += chr(c)
-			folder = outFile[0:outFile.rfind("/")]
-			if (not os.path.exists(folder)):
-				os.makedirs(folder)
-			self.decodeFileStream(fIn, outFile, targetProgress)
-			compressor = Compressor()
-			compressor.decompressFile(outFile, outFile[:-11])
+		self.writeFolder(folder+"/plain")
+		if (decode):
+			self.edoc.encodeFolder(folder+"/plain", folder+"/plain.edoc")
+			start = time.perf_counter()
+			self.edoc.decodeFolder(folder+"/plain.edoc")
+		else:
+			start = time.perf_counter()
+			self.edoc.encodeFolder(folder+"/plain", folder+"/plain.edoc")
+		return time.perf_counter()-start
+workerEdoc = None
+def initWorker(pw, segmentSize=64*1024*1024, level=None, fsync=False):
+	"""
+	Initializes a worker process of a process pool.
+	
+	Parameters:
+		pw (string): password
+		segmentSize (int): plain numbers per independently seeded segment
+		level (int): compression level
+		fsync (bool): whether restored files are forced onto the disk
+	"""
+	global workerEdoc
+	workerEdoc = Edoc(pw, segmentSize, level=level, fsync=fsync)
+def encodeSegment(data):
+	"""
+	Encodes a single segment of a segmented file inside a worker process.
+	
+	Parameters:
+		data (bytes): plain numbers of the segment
+	
+	Returns:
+		bytes: seed and encoded blocks
+	"""
+	return workerEdoc.encodeSegment(data)
+def decodeSegment(inFile, offset, length):
+	"""
+	Decodes a single segment of a segmented file inside a worker process.
+	
+	Parameters:
+		inFile (string): path to the encoded file
+		offset (int): position of the seed of the segment
+		length (int): number of plain numbers in the segment
+	
+	Returns:
+		bytes: plain numbers
+	"""
+	with open(inFile, "rb") as fIn:
+		fIn.seek(offset)
+		encoded = fIn.read(256+length+(-length)%256)
+	return workerEdoc.decodeSegment(encoded, length)
+def encodeFolderFile(inFile, codecId):
+	"""
+	Compresses and encodes a whole file of a folder inside a worker process.
+	
+	Parameters:
+		inFile (string): path to file
+		codecId (int): id of the codec
+	
+	Returns:
+		tuple: stream written by encodeFileStream and number of compressed bytes
+	"""
+	fOut = io.BytesIO()
+	length = workerEdoc.encodeFileStream(inFile, fOut, codecs[codecId])
+	return fOut.getvalue(), length
+def decodeFolderFile(inFile, offset, codecId, outFile):
+	"""
+	Decodes and decompresses a whole file of a folder inside a worker process.
+	
+	Parameters:
+		inFile (string): path to the encoded folder
+		offset (int): position of the segmented stream of the file
+		codecId (int): id of the codec
+		outFile (string): path the file is restored to
+	"""
+	fIn = ReadBuffer(inFile, workerEdoc.readSize)
+	fIn.seek(offset)
+	writer = DecompressWriter(codecs[codecId].getDecompressor(), workerEdoc.getWriteBuffer(outFile))
+	workerEdoc.decodeFileStream(fIn, writer, True)
+	writer.close()
+	fIn.close()
 def getSize(folder):
 	"""
 	"""
 	if (os.path.isfile(folder)):
 		return os.stat(folder).st_size
-	size = 0
-	files = os.listdir(folder)
-	for file in files:
-		file = folder + "/" + file
-		if (os.path.isfile(file)):
-			size += getSize(file)
-		elif (os.path.isdir(file)):
-			size += getSize(file)
-	return size
+	return sum(size for name, size in scanFolder(folder))
+def scanFolder(folder, prefix="") -> list:
+	"""
+	Walks a folder once, every entry is looked up by a single os.scandir
+	and only files are stat'ed.
+	
+	Parameters:
+		folder (string): path to folder
+		prefix (string): path of folder relative to the scanned top folder
+	
+	Returns:
+		list: (path relative to the top folder, size) per file, sorted by path within every folder
+	"""
+	manifest = []
+	with os.scandir(folder) as it:
+		entries = sorted(it, key=lambda entry: entry.name)
+	for entry in entries:
+		if (entry.is_file()):
+			manifest.append((prefix+entry.name, entry.stat().st_size))
+		elif (entry.is_dir()):
+			manifest.extend(scanFolder(entry.path, prefix+entry.name+"/"))
+	return manifest
+class ReadBufferUnitTest(unittest.TestCase):
+	def test_simple(self):
+		with tempfile.TemporaryDirectory() as folder:
+			data = bytearray()
+			for i in range(randint(1, 256*64)):
+				data.append(randint(0, 255))
+			with open(folder+"/data", "wb") as f:
+				f.write(data)
+			for useMmap in (False, True):
+				readBuffer = ReadBuffer(folder+"/data", randint(1, 4096), useMmap)
+				self.assertEqual(readBuffer.map is not None, useMmap)
+				for i in range(256):
+					if (randint(0, 3) == 0):
+						readBuffer.seek(randint(0, len(data)))
+					pos = readBuffer.tell()
+					size = randint(0, 8192)
+					self.assertEqual(readBuffer.read(size), data[pos:pos+size])
+				readBuffer.close()
+	@unittest.skipUnless(os.path.exists("/dev/fd"), "pipes have no path without /dev/fd")
+	def test_pipe(self):
+		data = bytearray()
+		for i in range(randint(1, 256*64)):
+			data.append(randint(0, 255))
+		fRead, fWrite = os.pipe()
+		writer = threading.Thread(target=lambda: (os.write(fWrite, data), os.close(fWrite)))
+		writer.start()
+		readBuffer = ReadBuffer("/dev/fd/"+str(fRead), randint(1, 4096), True)
+		self.assertIsNone(readBuffer.map)
+		read = bytearray()
+		while (True):
+			chunk = readBuffer.read(randint(1, 8192))
+			if (len(chunk) == 0):
+				break
+			read += chunk
+		readBuffer.close()
+		writer.join()
+		os.close(fRead)
+		self.assertEqual(read, data)
+class WriteBufferUnitTest(unittest.TestCase):
+	def test_simple(self):
+		with tempfile.TemporaryDirectory() as folder:
+			for background in (False, True):
+				expected = bytearray()
+				writeBuffer = WriteBuffer(folder+"/sub/data", randint(1, 4096), background, randint(1, 4))
+				for i in range(256):
+					if (randint(0, 7) == 0):
+						writeBuffer.seek(randint(0, len(expected)))
+					pos = writeBuffer.tell()
+					data = bytes(randint(0, 255) for j in range(randint(0, 8192)))
+					writeBuffer.write(memoryview(data))
+					expected[pos:pos+len(data)] = data
+				writeBuffer.close()
+				with open(folder+"/sub/data", "rb") as f:
+					self.assertEqual(f.read(), expected)
+	def test_concurrentFolder(self):
+		with tempfile.TemporaryDirectory() as folder:
+			for i in range(16):
+				barrier = threading.Barrier(8)
+				errors = []
+				def create(j):
+					barrier.wait()#all threads find the parent missing and create it at the same time
+					try:
+						WriteBuffer(folder+"/"+str(i)+"/sub/data"+str(j)).close()
+					except OSError as e:
+						errors.append(e)
+				threads = [threading.Thread(target=create, args=(j,)) for j in range(8)]
+				for thread in threads:
+					thread.start()
+				for thread in threads:
+					thread.join()
+				self.assertEqual(errors, [])
+				self.assertEqual(sorted(os.listdir(folder+"/"+str(i)+"/sub")), sorted("data"+str(j) for j in range(8)))
+class ArchiverUnitTest(unittest.TestCase):
+	def test_simple(self):
+		with tempfile.TemporaryDirectory() as folder:
+			files = {}
+			for i in range(randint(1, 16)):
+				name = "/".join(str(randint(0, 3)) for j in range(randint(0, 2)))+"/file"+str(i)
+				files[name.lstrip("/")] = bytes(randint(0, 255) for j in range(randint(0, 4096)))
+			for name, data in files.items():
+				os.makedirs(os.path.dirname(folder+"/in/"+name), exist_ok=True)
+				with open(folder+"/in/"+name, "wb") as f:
+					f.write(data)
+			archiver = Archiver(folder+"/in", readSize=randint(1, 1024))
+			archive = bytearray()
+			while (True):
+				chunk = archiver.read()
+				if (len(chunk) == 0):
+					break
+				archive += chunk
+			archiver.close()
+			dearchiver = Dearchiver(folder+"/out")
+			pos = 0
+			while (pos < len(archive)):
+				size = randint(1, 64)
+				dearchiver.write(archive[pos:pos+size])
+				pos += size
+			dearchiver.close()
+			for name, data in files.items():
+				with open(folder+"/out/"+name, "rb") as f:
+					self.assertEqual(f.read(), data)
+	def test_manifest(self):
+		with tempfile.TemporaryDirectory() as folder:
+			files = {}
+			for i in range(randint(1, 16)):
+				name = "/".join(str(randint(0, 3)) for j in range(randint(0, 2)))+"/file"+str(i)
+				files[name.lstrip("/")] = bytes(randint(0, 255) for j in range(randint(0, 4096)))
+			for name, data in files.items():
+				os.makedirs(os.path.dirname(folder+"/in/"+name), exist_ok=True)
+				with open(folder+"/in/"+name, "wb") as f:
+					f.write(data)
+			os.makedirs(folder+"/in/empty")
+			manifest = scanFolder(folder+"/in")
+			self.assertEqual(sorted(manifest), sorted((name, len(data)) for name, data in files.items()))
+			self.assertEqual(getSize(folder+"/in"), sum(len(data) for data in files.values()))
+			archiver = Archiver(folder+"/in", readSize=randint(1, 1024), manifest=manifest)
+			walker = Archiver(folder+"/in", readSize=randint(1, 1024))
+			self.assertEqual(b"".join(iter(archiver.read, b"")), b"".join(iter(walker.read, b"")))
+			archiver.close()
+			walker.close()
+	def test_truncated(self):
+		with tempfile.TemporaryDirectory() as folder:
+			dearchiver = Dearchiver(folder)
+			dearchiver.write(bytes([0, 4])+b"file"+bytes([0, 0, 0, 0, 0, 0, 0, 2, 1]))
+			self.assertRaises(ValueError, dearchiver.close)
+			dearchiver = Dearchiver(folder)
+			self.assertRaises(ValueError, dearchiver.write, bytes([0, 2])+b".."+bytes(8))
+class ProgressReporterUnitTest(unittest.TestCase):
+	class RecordingSink(ProgressSink):
+		def __init__(self):
+			self.updates = []
+			self.finished = False
+		def update(self, done, total, elapsed, remaining):
+			self.updates.append((done, total))
+		def finish(self):
+			self.finished = True
+	def test_rateLimit(self):
+		sink = self.RecordingSink()
+		progress = ProgressReporter(sink, rate=1e-3, checkSize=1)
+		progress.begin(1000)
+		for i in range(1000):
+			progress.add(1)
+		progress.finish()
+		self.assertEqual(sink.updates, [(0, 1000), (1000, 1000)])
+		self.assertTrue(sink.finished)
+	def test_checkSize(self):
+		sink = self.RecordingSink()
+		progress = ProgressReporter(sink, rate=float("inf"), checkSize=100)
+		progress.begin(1000)
+		for i in range(1000):
+			progress.add(1)
+		self.assertEqual(sink.updates, [(i, 1000) for i in range(0, 1001, 100)])
+	def test_sinks(self):
+		stream = io.StringIO()
+		sink = JSONSink(stream)
+		sink.update(1, 4, 1.0, 3.0)
+		self.assertEqual(json.loads(stream.getvalue()), {"done":1,"total":4,"elapsed":1.0,"remaining":3.0})
+		self.assertEqual(ProgressSink().format(1, 4, 3723), "25.0% 01:02:03")
+		self.assertRaises(ValueError, getProgressSink, "missing")
+class BenchmarkUnitTest(unittest.TestCase):
+	def test_syntheticData(self):
+		for entropy in (0, 1, 4, 8):
+			data = getSyntheticData(256*64, entropy)
+			self.assertEqual(len(data), 256*64)
+			self.assertLessEqual(len(set(data)), 2**entropy)
+			self.assertAlmostEqual(getEntropy(data), entropy, delta=0.1)
+	def test_simple(self):
+		edoc = Edoc("".join(chr(randint(0, 255)) for i in range(randint(1, 4096))), 256*4)
+		benchmark = Benchmark(edoc, randint(0, 256*16))
+		report = json.loads(json.dumps(benchmark.run()))
+		self.assertEqual([result["stage"] for result in report["results"]], [name for name, stage in benchmark.stages])
+		for result in report["results"]:
+			self.assertEqual(result["bytes"], len(benchmark.data))
+			self.assertGreaterEqual(result["seconds"], 0)
+		report = benchmark.run(["SBox.encode", "Edoc.decodeFolder"])
+		self.assertEqual([result["stage"] for result in report["results"]], ["SBox.encode", "Edoc.decodeFolder"])
 class SBoxUnitTest(unittest.TestCase):
 	def setUp(self):
 		self.pw = []
@@ -1227,6 +3212,27 @@ class PBoxUnitTest(unittest.TestCase):
 					decodedMatches += 1
 			self.assertTrue(encodedMatches < 256/10)
 			self.assertTrue(decodedMatches == 256)
+	def test_reference(self):
+		plain = []
+		for i in range(256):
+			plain.append(randint(0, 255))
+		for seed in range(256):
+			expected = [0]*256
+			for i in range(256):
+				for b in range(8):
+					if (plain[i] & (1<<b)):
+						index = self.pBox.encodeMap[(i*8+b+seed)%2048]
+						expected[index//8] += 1<<(index%8)
+			encoded = self.pBox.encode(plain, seed)
+			self.assertEqual(list(encoded), expected)
+			expected = [0]*256
+			for i in range(256):
+				for b in range(8):
+					if (encoded[i] & (1<<b)):
+						index = (self.pBox.decodeMap[i*8+b]-seed)%2048
+						expected[index//8] += 1<<(index%8)
+			self.assertEqual(list(self.pBox.decode(encoded, seed)), expected)
+			self.assertEqual(list(self.pBox.decode(encoded, seed)), plain)
 class SPBoxUnitTest(unittest.TestCase):
 	def setUp(self):
 		self.pw = []
@@ -1241,15 +3247,19 @@ class SPBoxUnitTest(unittest.TestCase):
 		for i in range(randint(1, 256)):
 			plain.append(randint(0, 255))
 		length = len(plain)
+		while (len(plain)%256 != 0):
+			plain.append(randint(0, 255))
 		seed = self.spBox.getSeed()
 		for i in range(256):
 			self.assertTrue(self.spBox.seed[i] != 0)
-		encoded = self.spBox.encode(plain)
+		encoded = bytearray(256)
+		self.spBox.encodeBlocks(bytes(plain), encoded)
 		for i in range(256):
 			self.assertTrue(self.spBox.seed[i] != 0)
 		seed2 = self.spBox.getSeed()
 		self.spBox.setSeed(seed)
-		decoded = self.spBox.decode(encoded)
+		decoded = bytearray(256)
+		self.spBox.decodeBlocks(encoded, decoded)
 		decodedMatches = 0
 		seedMatches = 0
 		for i in range(256):
@@ -1261,6 +3271,141 @@ class SPBoxUnitTest(unittest.TestCase):
 		self.assertTrue(decodedMatches == length)#TODO encodeMatches
 		self.assertTrue(seedMatches < 256/10)
 		#TODO encode 2nd batch#plain is edited
+	def test_reference(self):
+		plain = []
+		for i in range(256):
+			plain.append(randint(0, 255))
+		seed = self.spBox.getSeed()
+		pSeed = sum(seed)%256
+		expected = plain
+		for round in range(8):
+			block = [0]*256
+			for i in range(256):
+				block[i] = expected[i] ^ self.spBox.sBoxes[round].encodeMap[i] ^ seed[i]
+				for j in range(8):
+					if ((seed[i] & (1<<j)) != 0):
+						block[i] = self.spBox.sBoxes[j].encodeMap[block[i]]
+			expected = self.spBox.pBox.encode(block, pSeed)
+		encoded = self.spBox.encodeRounds(bytes(plain))
+		self.assertEqual(encoded, expected)
+		nextSeed = self.spBox.getSeed()
+		for i in range(256):
+			self.assertEqual(nextSeed[i], (plain[i] ^ seed[i]) or 1)
+		self.spBox.setSeed(seed)
+		self.assertEqual(list(self.spBox.decodeRounds(encoded)), plain)
+		self.assertEqual(self.spBox.getSeed(), nextSeed)
+	def test_blocks(self):
+		plain = bytearray()
+		for i in range(256*randint(1, 8)):
+			plain.append(randint(0, 255))
+		seed = self.spBox.getSeed()
+		expected = bytearray()
+		for offset in range(0, len(plain), 256):
+			expected += self.spBox.encodeRounds(plain[offset:offset+256])
+		self.spBox.setSeed(seed)
+		buffer = bytearray(plain)
+		self.spBox.encodeBlocks(memoryview(buffer), buffer)
+		self.assertEqual(buffer, expected)
+		self.spBox.setSeed(seed)
+		decoded = bytearray(len(buffer)+256)
+		self.spBox.decodeBlocks(bytes(buffer), memoryview(decoded))
+		self.assertEqual(decoded[:len(plain)], plain)
+class CompressorUnitTest(unittest.TestCase):
+	def reference(self, data, maxSize):
+		table = {}
+		for i in range(256):
+			table[(i,)] = i
+		size = 256
+		phrase = ()
+		returnValue = bytearray()
+		for c in data:
+			phrase += (c,)
+			if (phrase not in table):
+				prev = table[phrase[:-1]]
+				returnValue.append(prev>>8)
+				returnValue.append(prev&255)
+				if (size == maxSize):
+					phrase = phrase[-1:]
+				else:
+					table[phrase] = size
+					size += 1
+					returnValue.append(phrase[-1])
+					phrase = ()
+		if (len(phrase) > 0):
+			prev = table[phrase]
+			returnValue.append(prev>>8)
+			returnValue.append(prev&255)
+		return returnValue
+	def test_reference(self):
+		data = bytearray()
+		for i in range(randint(1, 256*64)):
+			data.append(randint(0, 15))
+		for maxSize in (256*4, 256*256):
+			compressor = Compressor()
+			compressor.maxSize = maxSize
+			compressed = bytearray()
+			offset = 0
+			while (offset < len(data)):
+				n = randint(0, 1024)
+				compressed += compressor.compress(memoryview(data)[offset:offset+n])
+				offset += n
+			compressed += compressor.close()
+			self.assertEqual(compressed, self.reference(data, maxSize))
+class DecompressorUnitTest(unittest.TestCase):
+	def test_simple(self):
+		data = bytearray()
+		for i in range(randint(1, 256*64)):
+			data.append(randint(0, 15))
+		for maxSize in (256*4, 256*256):
+			compressor = Compressor()
+			compressor.maxSize = maxSize
+			compressed = compressor.compress(data)+compressor.close()
+			decompressor = Decompressor()
+			decompressor.maxSize = maxSize
+			decompressed = bytearray()
+			offset = 0
+			while (offset < len(compressed)):
+				n = randint(0, 1024)
+				decompressed += decompressor.decompress(memoryview(compressed)[offset:offset+n])
+				offset += n
+			decompressed += decompressor.close()
+			self.assertEqual(decompressed, data)
+	def test_adaptive(self):
+		data = bytearray()
+		for i in range(256*64):
+			data.append(randint(0, 3))
+		for i in range(256*256):
+			data.append(randint(128, 255))
+		for i in range(256*64):
+			data.append(randint(0, 3))
+		compressor = Compressor(True)
+		compressor.maxSize = 256*4
+		compressor.windowSize = 1024
+		compressed = compressor.compress(data)+compressor.close()
+		self.assertTrue(bytes([Compressor.clearCode>>8, Compressor.clearCode&255]) in compressed)
+		decompressor = Decompressor(True)
+		decompressor.maxSize = 256*4
+		decompressed = decompressor.decompress(compressed)+decompressor.close()
+		self.assertEqual(decompressed, data)
+class CodecUnitTest(unittest.TestCase):
+	def test_simple(self):
+		data = bytearray()
+		for i in range(randint(1, 256*64)):
+			data.append(randint(0, 15))
+		for codec in codecs:
+			self.assertEqual(codecs[codec.id], codec)
+			self.assertEqual(getCodec(codec.name), codec)
+			compressor = codec.getCompressor()
+			compressed = compressor.compress(data)+compressor.close()
+			decompressor = codec.getDecompressor()
+			decompressed = bytearray()
+			for offset in range(0, len(compressed), 1000):
+				decompressed += decompressor.decompress(compressed[offset:offset+1000])
+			decompressed += decompressor.close()
+			self.assertEqual(decompressed, data)
+	def test_entropy(self):
+		self.assertEqual(getEntropy(bytes(1000)), 0)
+		self.assertAlmostEqual(getEntropy(bytes(range(256))*4), 8)
 class EdocUnitTest(unittest.TestCase):
 	def setUp(self):
 		self.pw = ""
@@ -1287,6 +3432,182 @@ class EdocUnitTest(unittest.TestCase):
 		self.assertTrue(decodedMatches == 2*len(plain))#TODO encodeMatches
 		self.assertTrue(len(decoded1) == len(plain))
 		self.assertTrue(len(decoded2) == len(plain))
+	def test_fileStream(self):
+		with tempfile.TemporaryDirectory() as folder:
+			plain = bytearray()
+			for i in range(randint(0, 256*4*16)):
+				plain.append(randint(0, 255))
+			inFile = folder+"/plain"
+			with open(inFile, "wb") as f:
+				f.write(plain)
+			self.edoc.segmentSize = 0
+			with open(folder+"/encoded", "wb") as fOut:
+				self.edoc.encodeFileStream(inFile, fOut)
+			with open(folder+"/encoded", "rb") as fIn, open(folder+"/decoded", "wb") as fOut:
+				self.edoc.decodeFileStream(fIn, fOut)
+				self.assertEqual(len(fIn.read()), 0)
+			with open(folder+"/decoded", "rb") as f:
+				self.assertEqual(f.read(), plain)
+	def test_file(self):
+		with tempfile.TemporaryDirectory() as folder:
+			plain = bytearray()
+			for i in range(randint(1, 256*4*16)):
+				plain.append(randint(0, 7))
+			inFile = folder+"/plain"
+			with open(inFile, "wb") as f:
+				f.write(plain)
+			for segmentSize, codec in [(0, "lzw"), (256*4, "auto")]+[(256*4, codec.name) for codec in codecs]:
+				self.edoc.segmentSize = segmentSize
+				self.edoc.codec = codec
+				self.edoc.useMmap = randint(0, 1) == 1
+				self.edoc.writeBehind = randint(0, 1) == 1
+				self.edoc.writeSize = randint(1, 4096)
+				self.edoc.encodeFile(inFile, inFile+".edoc")
+				os.remove(inFile)
+				self.edoc.decodeFile(inFile+".edoc", inFile)
+				self.assertEqual(os.listdir(folder), ["plain"])
+				with open(inFile, "rb") as f:
+					self.assertEqual(f.read(), plain)
+	def test_folder(self):
+		with tempfile.TemporaryDirectory() as root:
+			files = {}
+			for i in range(randint(1, 8)):
+				plain = bytearray()
+				for j in range(randint(0, 256*16)):
+					plain.append(randint(0, 7))
+				files["sub"+str(i%3)+"/file"+str(i)] = plain
+			for segmentSize, solid, index, fileType in ((0, False, False, 1), (256*4, False, False, 3), (256*4, True, False, 4), (256*4, False, True, 5)):
+				self.edoc.segmentSize = segmentSize
+				self.edoc.solid = solid
+				self.edoc.index = index
+				self.edoc.codec = "auto"
+				for file in files:
+					os.makedirs(os.path.dirname(root+"/folder/"+file), exist_ok=True)
+					with open(root+"/folder/"+file, "wb") as f:
+						f.write(files[file])
+				self.edoc.encodeFolder(root+"/folder", root+"/folder.edoc")
+				self.assertEqual(os.listdir(root), ["folder.edoc"])
+				with open(root+"/folder.edoc", "rb") as f:
+					self.assertEqual(f.read(1)[0], fileType)
+				self.edoc.decodeFolder(root+"/folder.edoc")
+				self.assertEqual(os.listdir(root), ["folder"])
+				for file in files:
+					with open(root+"/folder/"+file, "rb") as f:
+						self.assertEqual(f.read(), files[file])
+				shutil.rmtree(root+"/folder")
+	def test_parallelFolder(self):
+		with tempfile.TemporaryDirectory() as root:
+			files = {}
+			for i in range(randint(1, 16)):
+				plain = bytearray()
+				for j in range(randint(0, 256*4*(1+i%4))):
+					plain.append(randint(0, 7))
+				files["sub"+str(i%3)+"/file"+str(i)] = plain
+			self.edoc.segmentSize = 256*4
+			self.edoc.codec = "auto"
+			for index, encodeJobs, decodeJobs in ((False, 2, 1), (False, 1, 2), (True, 2, 2)):
+				self.edoc.index = index
+				for file in files:
+					os.makedirs(os.path.dirname(root+"/folder/"+file), exist_ok=True)
+					with open(root+"/folder/"+file, "wb") as f:
+						f.write(files[file])
+				self.edoc.jobs = encodeJobs
+				self.edoc.encodeFolder(root+"/folder", root+"/folder.edoc")
+				if (index):
+					fIn = ReadBuffer(root+"/folder.edoc")
+					self.assertEqual(sorted(entry[0] for entry in readIndex(fIn)), sorted(files))
+					fIn.close()
+				self.edoc.jobs = decodeJobs
+				self.edoc.decodeFolder(root+"/folder.edoc")
+				self.assertEqual(os.listdir(root), ["folder"])
+				for file in files:
+					with open(root+"/folder/"+file, "rb") as f:
+						self.assertEqual(f.read(), files[file])
+				shutil.rmtree(root+"/folder")
+	def test_parallelFreshFolder(self):
+		with tempfile.TemporaryDirectory() as root:
+			files = {}
+			for i in range(128):
+				files["sub"+str(i%32)+"/file"+str(i)] = bytes(randint(0, 7) for j in range(randint(0, 256)))
+			for file in files:
+				os.makedirs(os.path.dirname(root+"/folder/"+file), exist_ok=True)
+				with open(root+"/folder/"+file, "wb") as f:
+					f.write(files[file])
+			self.edoc.segmentSize = 256*4
+			self.edoc.codec = "auto"
+			self.edoc.jobs = 8
+			self.edoc.encodeFolder(root+"/folder", root+"/folder.edoc")
+			self.edoc.decodeFolder(root+"/folder.edoc")
+			for file in files:
+				with open(root+"/folder/"+file, "rb") as f:
+					self.assertEqual(f.read(), files[file])
+	def test_index(self):
+		with tempfile.TemporaryDirectory() as root:
+			files = {}
+			for i in range(randint(1, 8)):
+				plain = bytearray()
+				for j in range(randint(0, 256*16)):
+					plain.append(randint(0, 7))
+				files["sub"+str(i%3)+"/file"+str(i)] = plain
+				os.makedirs(os.path.dirname(root+"/folder/"+"sub"+str(i%3)+"/file"+str(i)), exist_ok=True)
+				with open(root+"/folder/"+"sub"+str(i%3)+"/file"+str(i), "wb") as f:
+					f.write(plain)
+			self.edoc.segmentSize = 256*4
+			self.edoc.codec = "auto"
+			self.edoc.index = True
+			self.edoc.encodeFolder(root+"/folder", root+"/folder.edoc")
+			fIn = ReadBuffer(root+"/folder.edoc")
+			entries = readIndex(fIn)
+			fIn.close()
+			self.assertEqual(sorted(entry[0] for entry in entries), sorted(files))
+			for name, codecId, offset, size, length in entries:
+				self.assertEqual(size, len(files[name]))
+			file = choice(list(files))
+			self.edoc.extractFile(root+"/folder.edoc", file)
+			self.assertEqual(sorted(os.listdir(root)), ["folder", "folder.edoc"])
+			with open(root+"/folder/"+file, "rb") as f:
+				self.assertEqual(f.read(), files[file])
+			self.assertRaises(KeyError, self.edoc.extractFile, root+"/folder.edoc", "missing")
+	def test_tamperedPath(self):
+		with tempfile.TemporaryDirectory() as root:
+			self.edoc.segmentSize = 256*4
+			self.edoc.codec = "auto"
+			for index, name in itertools.product((False, True), ("../xyz", "/abcde", "..\\xyz", "C:\\xyz", "C:xyzw")):
+				os.makedirs(root+"/folder", exist_ok=True)
+				with open(root+"/folder/abcdef", "wb") as f:
+					f.write(bytes(randint(0, 7) for i in range(randint(0, 256*4))))
+				self.edoc.index = index
+				self.edoc.encodeFolder(root+"/folder", root+"/folder.edoc")
+				with open(root+"/folder.edoc", "rb") as f:
+					archive = f.read()
+				with open(root+"/folder.edoc", "wb") as f:
+					f.write(archive.replace(b"abcdef", name.encode("utf-8")))
+				if (index):
+					self.assertRaises(ValueError, self.edoc.extractFile, root+"/folder.edoc", name)
+				self.assertRaises(ValueError, self.edoc.decodeFolder, root+"/folder.edoc")
+				self.assertEqual(os.listdir(root), ["folder.edoc"])
+				os.remove(root+"/folder.edoc")
+	def test_segmentedFileStream(self):
+		with tempfile.TemporaryDirectory() as folder:
+			plain = bytearray()
+			for i in range(randint(256*4*4, 256*4*16)):
+				plain.append(randint(0, 255))
+			inFile = folder+"/plain"
+			with open(inFile, "wb") as f:
+				f.write(plain)
+			self.edoc.segmentSize = 256*randint(1, 8)
+			self.edoc.jobs = 2
+			with open(folder+"/encoded", "wb") as fOut:
+				self.edoc.encodeFileStream(inFile, fOut)
+			self.edoc.shutdownExecutor()
+			for jobs in (1, 2):
+				self.edoc.jobs = jobs
+				with open(folder+"/encoded", "rb") as fIn, open(folder+"/decoded", "wb") as fOut:
+					self.edoc.decodeFileStream(fIn, fOut, True)
+					self.assertEqual(len(fIn.read()), 0)
+				with open(folder+"/decoded", "rb") as f:
+					self.assertEqual(f.read(), plain)
+			self.edoc.shutdownExecutor()
 if __name__ == "__main__":
 	PROJECTNAME = "edoc"
 	LOGNAME = PROJECTNAME+".log"
@@ -1297,7 +3618,7 @@ if __name__ == "__main__":
 	if (useCurses):
 		import curses
 	if (profiling):
-		import cProfile, pstats, io
+		import cProfile, pstats
 		
 	logger = logging.getLogger(PROJECTNAME)
 	logger.setLevel(logging.DEBUG)
@@ -1318,19 +3639,58 @@ if __name__ == "__main__":
 	parser.add_argument("-p", "--password", action="store", metavar="password", help="Specify password.")
 	parser.add_argument("-f", "--file", help="Specify file/folder.")
 	parser.add_argument("-t", "--test", action="store_true", help="Runs unittests.")
+	parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Specify number of processes used to encode and decode segmented files and the files of folders.")
+	parser.add_argument("-c", "--codec", default="auto", choices=["auto"]+[codec.name for codec in codecs], help="Specify compression, auto skips compression of incompressible files, requires segments.")
+	parser.add_argument("-m", "--mmap", action="store_true", help="Map input files into memory instead of reading them.")
+	parser.add_argument("-w", "--write-behind", action="store_true", help="Write output files from a background thread.")
+	parser.add_argument("--fsync", action="store_true", help="Force output files onto the disk before closing them.")
+	parser.add_argument("--solid", action="store_true", help="Encode folders as a single stream, requires segments.")
+	parser.add_argument("-i", "--index", action="store_true", help="Append an index to encoded folders, requires segments.")
+	parser.add_argument("--list", action="store_true", help="Lists the files of an encoded folder with index.")
+	parser.add_argument("--extract", metavar="PATH", help="Decodes a single file of an encoded folder with index.")
+	parser.add_argument("-b", "--bench", action="store_true", help="Measures the throughput of all stages and prints it as JSON.")
+	parser.add_argument("--bench-size", type=int, default=1024, metavar="KiB", help="Specify size of the synthetic data of the benchmark.")
+	parser.add_argument("--bench-entropy", type=float, default=4.0, metavar="bits", help="Specify entropy per byte of the synthetic data of the benchmark.")
+	parser.add_argument("--bench-repeat", type=int, default=1, help="Specify number of runs per stage of the benchmark, the best one is reported.")
+	parser.add_argument("--progress", default="tty", choices=progressSinks, help="Specify how the progress is displayed.")
+	parser.add_argument("-l", "--level", type=int, help="Specify compression level of zlib, lzma or bz2.")
+	parser.add_argument("-s", "--segment-size", type=int, default=64, metavar="MiB", help="Specify size of independently seeded segments, 0 writes the unsegmented format.")
 	args = vars(parser.parse_args())
 	file = args["file"]
 	password = args["password"]
 	encodeMode = args["encode"]
 	testMode = args["test"]
+	jobs = args["jobs"]
+	segmentSize = args["segment_size"]*1024*1024
+	codec = args["codec"]
+	level = args["level"]
+	useMmap = args["mmap"]
+	writeBehind = args["write_behind"]
+	fsync = args["fsync"]
+	solid = args["solid"]
+	index = args["index"]
+	listMode = args["list"]
+	extractPath = args["extract"]
+	progressMode = args["progress"]
+	benchMode = args["bench"]
 	root = None
-	progress = 0
-	start = 0
+	window = None
 	pr = None
 	if (testMode):
 		unittest.main(argv=[sys.argv[0]])
 		input("Press Enter to leave")
 		exit()
+	elif (listMode):
+		fIn = ReadBuffer(file)
+		for name, codecId, offset, size, length in readIndex(fIn):
+			print(str(size).rjust(12)+" "+str(length).rjust(12)+" "+codecs[codecId].name.ljust(12)+" "+name)
+		fIn.close()
+	elif (benchMode):
+		if (password is None):
+			password = "".join(chr(randint(0, 255)) for i in range(4096))
+		edoc = Edoc(password, segmentSize, jobs, codec, level, useMmap, writeBehind, fsync, solid, index)
+		benchmark = Benchmark(edoc, args["bench_size"]*1024, args["bench_entropy"], args["bench_repeat"])
+		print(json.dumps(benchmark.run(), indent="\t"))
 	else:
 		if (password is None):
 			password = input("Enter password: ")
@@ -1342,16 +3702,20 @@ if __name__ == "__main__":
 			if (profiling):
 				pr = cProfile.Profile()
 				pr.enable()
-			edoc = Edoc(password)
-			start = time.time()
-			if (os.path.isfile(file)):
+			if (progressMode == "curses" and window is None):
+				window = curses.initscr()
+			progress = ProgressReporter(getProgressSink(progressMode, window))
+			edoc = Edoc(password, segmentSize, jobs, codec, level, useMmap, writeBehind, fsync, solid, index, progress)
+			if (extractPath is not None):
+				edoc.extractFile(file, extractPath)
+			elif (os.path.isfile(file)):
 				if (encodeMode):
 					edoc.encodeFile(file, file+".edoc")
 				else:
 					fIn = open(file, "rb")
 					startingByte = fIn.read(1)
 					fIn.close()
-					if (ord(startingByte) == 0):
+					if (ord(startingByte) in (0, 2)):#file, otherwise folder
 						edoc.decodeFile(file, file[0:-5])
 					else:
 						edoc.decodeFolder(file)
@@ -1364,4 +3728,6 @@ if __name__ == "__main__":
 				sortby = "cumulative"
 				ps = pstats.Stats(pr, stream=s).sort_stats(sortby)
 				ps.print_stats()
-				logger.info(s.getvalue())
\ No newline at end of file
+				logger.info(s.getvalue())
+			if (window is not None):
+				curses.endwin()
\ No newline at end of file
@@ -1,23 +1,169 @@
 #!/usr/bin/env python3.4
 
+import os
+import importlib.util
+#eventlet or gevent serve every connection on a green thread and have to patch the standard library
+#before anything else is imported, threading uses a thread per connection, unset picks the first one installed
+#like Flask-SocketIO would, so the mode that is patched for is the mode that runs
+ASYNCMODE = os.environ.get("EDOC_ASYNC_MODE")
+if (ASYNCMODE is None):
+	ASYNCMODE = next((mode for mode in ("eventlet", "gevent") if importlib.util.find_spec(mode) is not None), "threading")
+if (ASYNCMODE == "eventlet"):
+	import eventlet
+	eventlet.monkey_patch()
+elif (ASYNCMODE == "gevent"):
+	from gevent import monkey
+	monkey.patch_all()
 import logging
-from flask import Flask, render_template, session
+import logging.handlers
+from flask import Flask, render_template, session, request
 from flask_socketio import SocketIO, emit, join_room, leave_room
+from socketio import PubSubManager
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Connection, answer_challenge, deliver_challenge
+import ipaddress
+import socket
 import sqlite3
+import threading
 import time
+import unittest
 
-HOST = "coding42.diphda.uberspace.de"
-PORT = 62155
+HOST = os.environ.get("EDOC_HOST", "coding42.diphda.uberspace.de")
+PORT = int(os.environ.get("EDOC_PORT", 62155))
+#index of this process and number of processes serving the same clients behind a load balancer
+WORKER = int(os.environ.get("EDOC_WORKER", 0))
+WORKERS = int(os.environ.get("EDOC_WORKERS", 1))
+#None for a single process, redis://host:port, amqp://host:port, memory:// (kombu, in-process only)
+#or ipc://host:port for the built-in broker hosted by worker 0, which only listens on loopback addresses
+MESSAGEQUEUE = os.environ.get("EDOC_MESSAGE_QUEUE")
+#secret shared by the workers and the built-in broker, required for ipc://
+BROKERKEY = os.environ.get("EDOC_BROKER_KEY")
+#connections served at once, every websocket keeps one green thread and eventlet stops accepting at 1024 by default
+MAXCONNECTIONS = int(os.environ.get("EDOC_MAX_CONNECTIONS", 20000))
 
 PROJECTNAME = "edoc"
 DBNAME = PROJECTNAME+".sqlite"
 LOGNAME = PROJECTNAME+".log"
+SNAPSHOTINTERVAL = 1.0
+NOTICEINTERVAL = 1.0
+MAXNOTICES = 16
+MAXROOMNAME = 64
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = "BlaBlub42"
-socketio = SocketIO(app)
 app.config.update(PROPAGATE_EXCEPTIONS=True)
 
+#the built-in broker and its clients use sockets that were not patched by eventlet or gevent,
+#multiprocessing.connection reads their descriptors directly, so every blocking call runs on a native thread
+def openBrokerSocket():
+	return original("socket", "socket")(socket.AF_INET, socket.SOCK_STREAM)
+
+#accept wraps the new descriptor into the patched socket class, which leaves it non-blocking under gevent
+def openBrokerConnection(s):
+	fd = s.detach()
+	os.set_blocking(fd, True)
+	return Connection(fd)
+
+def connectBroker(address, authkey, retries=50):
+	for i in range(retries):
+		s = openBrokerSocket()
+		try:
+			s.connect(address)
+		except ConnectionRefusedError:
+			s.close()
+			if (i == retries-1):
+				raise
+			time.sleep(0.1)
+			continue
+		connection = openBrokerConnection(s)
+		answer_challenge(connection, authkey)
+		deliver_challenge(connection, authkey)
+		return connection
+
+class IPCManager(PubSubManager):
+	"""
+	IPCManager fans the emits of all workers on one machine out through the built-in broker,
+	for deployments and tests without Redis.
+	
+	Attributes:
+		address (tuple): host and port of the broker
+		authkey (bytes): secret the connections to the broker are authenticated with
+		publisher (Connection): connection emits are published on, opened on first use
+		publishLock (Lock): serializes the threads publishing on self.publisher
+	
+	Parameters:
+		url (string): ipc://host:port, host has to be a loopback address
+		authkey (string): secret the connections to the broker are authenticated with
+		channel (string): unused, all workers of a broker share one channel
+		write_only (bool): whether the manager only emits and never receives
+		logger (Logger): logger
+	
+	Raises:
+		ValueError: authkey is missing or host is no loopback address
+	"""
+	name = "ipc"
+	def __init__(self, url, authkey, channel="socketio", write_only=False, logger=None):
+		if (not authkey):
+			raise ValueError("ipc:// requires the secret EDOC_BROKER_KEY")
+		host, port = url[len("ipc://"):].rsplit(":", 1)
+		if (not ipaddress.ip_address(socket.gethostbyname(host)).is_loopback):
+			raise ValueError("ipc:// only accepts loopback addresses, not "+host)
+		self.address = (host, int(port))
+		self.authkey = authkey.encode()
+		self.publisher = None
+		self.publishLock = threading.Lock()
+		super().__init__(channel=channel, write_only=write_only, logger=logger)
+	def _publish(self, data):
+		with self.publishLock:
+			if (self.publisher is None):
+				self.publisher = runBlocking(connectBroker, self.address, self.authkey)
+				runBlocking(self.publisher.send_bytes, b"publish")
+			runBlocking(self.publisher.send, data)
+	def _listen(self):
+		subscriber = runBlocking(connectBroker, self.address, self.authkey)
+		runBlocking(subscriber.send_bytes, b"subscribe")
+		while True:
+			yield runBlocking(subscriber.recv)
+
+clientManager = None
+if (MESSAGEQUEUE is not None and MESSAGEQUEUE.startswith("ipc://")):
+	clientManager = IPCManager(MESSAGEQUEUE, BROKERKEY)
+	socketio = SocketIO(app, client_manager=clientManager, async_mode=ASYNCMODE)
+else:
+	socketio = SocketIO(app, message_queue=MESSAGEQUEUE, async_mode=ASYNCMODE)
+
+#returns an object of the standard library as it was before eventlet or gevent patched it,
+#objects shared with native threads must not be green
+def original(module, name):
+	if (ASYNCMODE == "eventlet"):
+		return getattr(eventlet.patcher.original(module), name)
+	if (ASYNCMODE == "gevent"):
+		return monkey.get_original(module, name)
+	return getattr(importlib.import_module(module), name)
+
+def startNativeThread(function, *args):
+	original("_thread", "start_new_thread")(function, args)
+
+class NativeQueueListener(logging.handlers.QueueListener):
+	"""
+	Writes the queued records on a native thread, a green one would only write them when the hub schedules it.
+	"""
+	def start(self):
+		if (ASYNCMODE == "gevent"):
+			from gevent import get_hub
+			self._thread = get_hub().threadpool.spawn(self._monitor)
+		else:
+			self._thread = original("threading", "Thread")(target=self._monitor, daemon=True)
+			self._thread.start()
+	def stop(self):
+		self.enqueue_sentinel()
+		if (ASYNCMODE == "gevent"):
+			self._thread.get()
+		else:
+			self._thread.join()
+		self._thread = None
+
+#handlers only enqueue their records, the listener writes them to the file and the console
 logger = logging.getLogger(PROJECTNAME)
 logger.setLevel(logging.DEBUG)
 fh = logging.FileHandler(LOGNAME)
@@ -27,37 +173,413 @@ ch.setLevel(logging.DEBUG)
 formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 fh.setFormatter(formatter)
 ch.setFormatter(formatter)
-logger.addHandler(fh)
-logger.addHandler(ch)
+logQueue = original("queue", "SimpleQueue")()
+logger.addHandler(logging.handlers.QueueHandler(logQueue))
+logListener = NativeQueueListener(logQueue, fh, ch, respect_handler_level=True)
+logListener.start()
+
+#runs blocking calls into sqlite3 on a native thread if the server runs on green threads,
+#so they do not stall the other connections
+def runBlocking(function, *args):
+	if (socketio.async_mode == "eventlet"):
+		from eventlet import tpool
+		return tpool.execute(function, *args)
+	if (socketio.async_mode == "gevent"):
+		from gevent import get_hub
+		return get_hub().threadpool.apply(function, args)
+	return function(*args)
+
+def raiseFileLimit():
+	try:
+		import resource
+		soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+		resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+		logger.info("file limit raised from "+str(soft)+" to "+str(hard))
+	except (ImportError, ValueError, OSError) as e:
+		logger.info(e)
+
+class PresenceRegistry:
+	"""
+	PresenceRegistry tracks all rooms and their members of this worker in memory.
+	The lobby (room 0) always exists, every other room is reaped as soon as its last member leaves.
+	Rooms of other workers are known from the snapshots of the shared database, ids of created
+	rooms are unique across workers as every worker only allocates ids equal to its index modulo workers.
+	
+	Attributes:
+		rooms (dict): id of a room -> {"name":name, "members":set of session ids}
+		users (dict): session id -> {"user":name, "room":id}
+		remoteRooms (dict): id of a room of another worker -> (name, number of members)
+		worker (int): index of this worker
+		workers (int): number of workers
+		nextId (int): counter of created rooms
+		lock (Lock): guards self.rooms, self.users, self.remoteRooms and self.nextId
+		dirty (bool): whether the rooms changed since the last snapshot
+	
+	Parameters:
+		worker (int): index of this worker
+		workers (int): number of workers
+	"""
+	def __init__(self, worker=0, workers=1):
+		self.rooms = {0:{"name":"", "members":set()}}
+		self.users = {}
+		self.remoteRooms = {}
+		self.worker = worker
+		self.workers = workers
+		self.nextId = 1
+		self.lock = threading.Lock()
+		self.dirty = True
+	def createRoom(self, name):
+		"""
+		Creates an empty room, which is reaped unless somebody joins it.
+		
+		Parameters:
+			name (string): name of the room
+		
+		Returns:
+			int: id of the room
+		"""
+		with self.lock:
+			room = self.nextId*self.workers+self.worker
+			self.nextId += 1
+			self.rooms[room] = {"name":name, "members":set()}
+			self.dirty = True
+			return room
+	def join(self, sid, room):
+		"""
+		Moves a session into a room of this or another worker.
+		
+		Parameters:
+			sid (string): session id
+			room (int): id of the room
+		
+		Returns:
+			bool: whether the room exists
+		"""
+		with self.lock:
+			if (room not in self.rooms):
+				if (room not in self.remoteRooms):
+					return False
+				self.rooms[room] = {"name":self.remoteRooms[room][0], "members":set()}
+			user = self.users.setdefault(sid, {"user":"Unknown User", "room":-1})
+			if (user["room"] == room):
+				return True
+			self.removeLocked(sid, user["room"])
+			self.rooms[room]["members"].add(sid)
+			user["room"] = room
+			self.dirty = True
+			return True
+	def leave(self, sid):
+		"""
+		Removes a session from its room and forgets it.
+		
+		Parameters:
+			sid (string): session id
+		
+		Returns:
+			dict: info of the session, None if it is unknown
+		"""
+		with self.lock:
+			user = self.users.pop(sid, None)
+			if (user is not None):
+				self.removeLocked(sid, user["room"])
+				self.dirty = True
+			return user
+	def removeLocked(self, sid, room):
+		"""
+		Removes a session from a room and reaps the room if it got empty, the caller holds self.lock.
+		
+		Parameters:
+			sid (string): session id
+			room (int): id of the room
+		"""
+		if (room in self.rooms):
+			members = self.rooms[room]["members"]
+			members.discard(sid)
+			if (room != 0 and len(members) == 0):
+				del self.rooms[room]
+	def setUser(self, sid, name):
+		"""
+		Sets the name of the user of a session.
+		
+		Parameters:
+			sid (string): session id
+			name (string): name of the user
+		"""
+		with self.lock:
+			self.users.setdefault(sid, {"user":"Unknown User", "room":-1})["user"] = name
+	def setRemoteRooms(self, rooms):
+		"""
+		Replaces the rooms of the other workers.
+		
+		Parameters:
+			rooms (list): (id, name, number of members) per room of the other workers
+		"""
+		with self.lock:
+			self.remoteRooms = {room:(name, users) for room, name, users in rooms}
+	def getRooms(self):
+		"""
+		Gets all rooms of all workers with their number of members.
+		
+		Returns:
+			list: (id, name, number of members) per room, sorted by id
+		"""
+		with self.lock:
+			rooms = {room:(name, users) for room, name, users in self.getRoomsLocked()}
+			for room, (name, users) in self.remoteRooms.items():
+				rooms[room] = (name, rooms.get(room, (name, 0))[1]+users)
+			return sorted((room, name, users) for room, (name, users) in rooms.items())
+	def getRoomsLocked(self):
+		"""
+		Gets all rooms of this worker, the caller holds self.lock.
+		
+		Returns:
+			list: (id, name, number of members) per room, sorted by id
+		"""
+		return sorted((room, info["name"], len(info["members"])) for room, info in self.rooms.items())
+	def snapshot(self):
+		"""
+		Gets all rooms of this worker if they changed since the last snapshot.
+		
+		Returns:
+			list: (id, name, number of members) per room, None if nothing changed
+		"""
+		with self.lock:
+			if (not self.dirty):
+				return None
+			self.dirty = False
+			return self.getRoomsLocked()
+	def setDirty(self):
+		"""
+		Marks the rooms as changed, so the next snapshot gets them again after a snapshot was lost.
+		"""
+		with self.lock:
+			self.dirty = True
+
+class NoticeBatcher:
+	"""
+	NoticeBatcher collects the connect and disconnect notices of the rooms, which a background task broadcasts in batches.
+	A wave of connections costs one message per member and interval instead of one per member and connection,
+	and no handler emits while a failed send closes a socket, which would run the next disconnect handler from within the emit.
+	
+	Attributes:
+		notices (dict): id of a room -> list of notices
+		dropped (dict): id of a room -> number of notices beyond maxNotices
+		maxNotices (int): notices kept per room and batch, further ones are only counted
+		lock (Lock): guards self.notices and self.dropped
+	
+	Parameters:
+		maxNotices (int): notices kept per room and batch
+	"""
+	def __init__(self, maxNotices=MAXNOTICES):
+		self.notices = {}
+		self.dropped = {}
+		self.maxNotices = maxNotices
+		self.lock = threading.Lock()
+	def add(self, room, notice):
+		"""
+		Queues a notice for the members of a room.
+		
+		Parameters:
+			room (int): id of the room
+			notice (dict): meta message
+		"""
+		with self.lock:
+			notices = self.notices.setdefault(room, [])
+			if (len(notices) < self.maxNotices):
+				notices.append(notice)
+			else:
+				self.dropped[room] = self.dropped.get(room, 0)+1
+	def take(self):
+		"""
+		Gets and clears the queued notices.
+		
+		Returns:
+			list: (id of a room, notices, number of dropped notices) per room with notices
+		"""
+		with self.lock:
+			batches = [(room, notices, self.dropped.get(room, 0)) for room, notices in self.notices.items()]
+			self.notices = {}
+			self.dropped = {}
+			return batches
+
+class RoomStore:
+	"""
+	RoomStore keeps the rooms table behind a single persistent connection per process.
+	The database runs in WAL mode and statements are constant strings, so sqlite3 reuses
+	their prepared form. The database is shared by all workers: every worker owns its rows
+	of the presence table, the rooms table sums them up.
+	
+	Attributes:
+		connection (Connection): persistent connection
+		lock (Lock): serializes all threads on the connection
+	
+	Parameters:
+		dbName (string): path to the database
+	"""
+	CREATE = "CREATE TABLE IF NOT EXISTS rooms(id INTEGER, name TEXT, users INTEGER, PRIMARY KEY(id))"
+	CREATEPRESENCE = "CREATE TABLE IF NOT EXISTS presence(worker INTEGER, room INTEGER, name TEXT, users INTEGER, PRIMARY KEY(worker, room))"
+	INSERT = "INSERT OR IGNORE INTO rooms (id, name, users) VALUES (?, ?, 0)"
+	DELETEPRESENCE = "DELETE FROM presence WHERE worker=?"
+	INSERTPRESENCE = "INSERT INTO presence (worker, room, name, users) VALUES (?, ?, ?, ?)"
+	DELETEROOMS = "DELETE FROM rooms"
+	SUMROOMS = "INSERT INTO rooms (id, name, users) SELECT room, MAX(name), SUM(users) FROM presence GROUP BY room"
+	SELECTREMOTE = "SELECT room, MAX(name), SUM(users) FROM presence WHERE worker<>? GROUP BY room"
+	def __init__(self, dbName):
+		self.connection = sqlite3.connect(dbName, check_same_thread = False, timeout = 30)
+		self.connection.execute("PRAGMA journal_mode=WAL")
+		self.connection.execute("PRAGMA synchronous=NORMAL")
+		#only taken by runBlocking on native threads
+		self.lock = original("threading", "Lock")()
+	def init(self, worker):
+		"""
+		Creates the tables and the lobby (room 0) and drops the rows a previous run of a worker left.
+		
+		Parameters:
+			worker (int): index of the worker
+		"""
+		with self.lock:
+			self.connection.execute(RoomStore.CREATE)
+			self.connection.execute(RoomStore.CREATEPRESENCE)
+			self.connection.execute(RoomStore.INSERT, (0, ""))
+			self.connection.execute(RoomStore.DELETEPRESENCE, (worker,))
+			self.connection.commit()
+	def setRooms(self, worker, rooms):
+		"""
+		Replaces the rows of a worker by a snapshot and sums up the rooms table in a single transaction.
+		
+		Parameters:
+			worker (int): index of the worker
+			rooms (list): (id, name, number of members) per room of the worker
+		"""
+		with self.lock:
+			try:
+				self.connection.execute(RoomStore.DELETEPRESENCE, (worker,))
+				self.connection.executemany(RoomStore.INSERTPRESENCE, [(worker, room, name, users) for room, name, users in rooms])
+				self.connection.execute(RoomStore.DELETEROOMS)
+				self.connection.execute(RoomStore.SUMROOMS)
+				self.connection.commit()
+			except sqlite3.Error:
+				self.connection.rollback()
+				raise
+	def getRemoteRooms(self, worker):
+		"""
+		Gets the rooms of all other workers.
+		
+		Parameters:
+			worker (int): index of the worker
+		
+		Returns:
+			list: (id, name, number of members) per room
+		"""
+		with self.lock:
+			return self.connection.execute(RoomStore.SELECTREMOTE, (worker,)).fetchall()
+	def close(self):
+		"""
+		Closes the connection.
+		"""
+		with self.lock:
+			self.connection.close()
+
+presence = PresenceRegistry(WORKER, WORKERS)
+noticeBatcher = NoticeBatcher()
+roomStore = None
+
+def getRoomStore():
+	global roomStore
+	if (roomStore is None):
+		roomStore = RoomStore(DBNAME)
+	return roomStore
+
+def snapshotPresence():
+	rooms = presence.snapshot()
+	if (rooms is not None):
+		try:
+			runBlocking(getRoomStore().setRooms, WORKER, rooms)
+		except Exception:
+			presence.setDirty()
+			raise
+	presence.setRemoteRooms(runBlocking(getRoomStore().getRemoteRooms, WORKER))
+
+#a failed snapshot, e.g. "database is locked" while other workers write, is retried in the next interval
+def snapshotLoop():
+	while True:
+		socketio.sleep(SNAPSHOTINTERVAL)
+		try:
+			snapshotPresence()
+		except Exception:
+			logger.exception("snapshot failed")
+
+def noticeLoop():
+	while True:
+		socketio.sleep(NOTICEINTERVAL)
+		for room, notices, dropped in noticeBatcher.take():
+			try:
+				socketio.emit("receiveMetaMessages", {"notices":notices,"dropped":dropped}, room=room)
+			except Exception:
+				logger.exception("notices of room "+str(room)+" lost")
 
 def initDB():
-	connection = sqlite3.connect(DBNAME, check_same_thread = False)
-	cursor = connection.cursor()
-	cursor.execute("CREATE TABLE IF NOT EXISTS rooms(id INTEGER, name TEXT, users INTEGER, PRIMARY KEY(id))")
+	runBlocking(getRoomStore().init, WORKER)
+	snapshotPresence()
+	socketio.start_background_task(snapshotLoop)
+
+#the broker only forwards raw bytes and never unpickles what it receives,
+#it runs on native threads, one accepting and one per connection
+def runBroker(address, authkey):
+	listener = openBrokerSocket()
+	listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+	listener.bind(address)
+	listener.listen()
+	subscribers = []
+	lock = original("threading", "Lock")()
+	while True:
+		s, peer = listener.accept()
+		connection = openBrokerConnection(s)
+		try:
+			deliver_challenge(connection, authkey)
+			answer_challenge(connection, authkey)
+		except (AuthenticationError, EOFError, OSError) as e:
+			logger.info(e)
+			connection.close()
+			continue
+		startNativeThread(serveBroker, connection, subscribers, lock)
+
+def serveBroker(connection, subscribers, lock):
 	try:
-		cursor.execute("INSERT INTO rooms (id, name, users) VALUES (0, '', 0)")
-	except sqlite3.IntegrityError:
-		pass
-	connection.commit()
-	connection.close()
+		if (connection.recv_bytes() == b"subscribe"):
+			with lock:
+				subscribers.append(connection)
+			return
+		while True:
+			data = connection.recv_bytes()
+			with lock:
+				for subscriber in list(subscribers):
+					try:
+						subscriber.send_bytes(data)
+					except OSError:
+						subscribers.remove(subscriber)
+	except (EOFError, OSError):
+		connection.close()
 
 def joinRoom(room):
-	connection = sqlite3.connect(DBNAME, check_same_thread = False)
-	cursor = connection.cursor()
-	cursor.execute("UPDATE rooms SET users=users+1 WHERE id=?", (room,))
-	connection.commit()
-	connection.close()
+	oldRoom = session.get("room", -1)
+	if (not presence.join(request.sid, room)):
+		return False
+	if (oldRoom != -1):
+		leave_room(oldRoom)
 	join_room(room)
 	session["room"] = room
+	return True
 
 def leaveRoom(room):
-	connection = sqlite3.connect(DBNAME, check_same_thread = False)
-	cursor = connection.cursor()
-	cursor.execute("UPDATE rooms SET users=users-1 WHERE id=?", (room,))#TODO delete room if emty
-	connection.commit()
-	connection.close()
+	user = presence.leave(request.sid)
 	leave_room(room)
 	session["room"] = -1
+	return user
+
+def listRooms():
+	rooms = presence.getRooms()
+	emit("createRooms", {"rooms":[room for room, name, users in rooms],"names":[name for room, name, users in rooms],"users":[users for room, name, users in rooms]})
 
 @app.route("/", methods=["GET", "POST"])
 def root():
@@ -127,28 +649,132 @@ def handleSendMetaMessage(json):
 	logger.info(json)
 	if ("oldUser" in json):
 		session["user"] = json["user"]
+		presence.setUser(request.sid, json["user"])
 	millis = int(round(time.time() * 1000))
 	json["time"] = millis
-	emit("receiveMetaMessage", json, room=0)
+	emit("receiveMetaMessage", json, room=session["room"])
+
+@socketio.on("createRoom")
+def handleCreateRoom(json):
+	logger.info(json)
+	name = str(json.get("name", ""))[:MAXROOMNAME]
+	room = presence.createRoom(name)
+	joinRoom(room)
+	emit("roomJoined", {"room":room,"name":name})
+
+@socketio.on("joinRoom")
+def handleJoinRoom(json):
+	logger.info(json)
+	try:
+		room = int(json["room"])
+	except (KeyError, TypeError, ValueError):
+		emit("roomError", {"error":"invalid room"})
+		return
+	if (not joinRoom(room)):
+		emit("roomError", {"error":"unknown room","room":room})
+		return
+	emit("roomJoined", {"room":room})
 
+@socketio.on("leaveRoom")
+def handleLeaveRoom():
+	joinRoom(0)
+	emit("roomJoined", {"room":0})
+
+@socketio.on("listRooms")
+def handleListRooms():
+	listRooms()
+
+#every session enters the lobby as "Unknown User", announcing the sessions of the lobby to all its members
+#would cost a message per member for every connection, so only the other rooms get notices
 @socketio.on("connect")
 def handleConnect():
 	joinRoom(0)
-	millis = int(round(time.time() * 1000))
-	emit("receiveMetaMessage", {"connected":True,"user":"Unknown User","time":millis}, room=0)
-	emit("createRooms", {"rooms":[0]}, room=0)
+	listRooms()
 
 @socketio.on("disconnect")
-def handleDisconnect():
+def handleDisconnect(reason=None):
 	room = session["room"]
-	leaveRoom(room)
-	millis = int(round(time.time() * 1000))
-	emit("receiveMetaMessage", {"user":session["user"],"disconnected":True,"time":millis}, room=0)
+	user = leaveRoom(room)
+	if (room > 0):
+		millis = int(round(time.time() * 1000))
+		noticeBatcher.add(room, {"user":user["user"] if user is not None else "Unknown User","disconnected":True,"time":millis})
 
 @socketio.on_error_default
 def error_handler(e):
 	logger.info(e)
 
+class PresenceRegistryUnitTest(unittest.TestCase):
+	def test_rejoin(self):
+		registry = PresenceRegistry()
+		room = registry.createRoom("room")
+		self.assertTrue(registry.join("a", room))
+		self.assertTrue(registry.join("a", room))#the only member must not reap the room it stays in
+		self.assertEqual(registry.getRooms(), [(0, "", 0), (room, "room", 1)])
+		self.assertTrue(registry.join("a", 0))
+		self.assertTrue(registry.join("a", 0))
+		self.assertEqual(registry.getRooms(), [(0, "", 1)])
+	def test_reaping(self):
+		registry = PresenceRegistry(1, 2)
+		room = registry.createRoom("room")
+		self.assertEqual(room % 2, 1)
+		for sid in ("a", "b"):
+			registry.join(sid, 0)
+			registry.join(sid, room)
+		registry.leave("a")
+		self.assertEqual(registry.getRooms(), [(0, "", 0), (room, "room", 1)])
+		registry.leave("b")
+		self.assertEqual(registry.getRooms(), [(0, "", 0)])
+		self.assertFalse(registry.join("a", room))
+		registry.join("a", 0)
+		registry.leave("a")
+		self.assertEqual(registry.getRooms(), [(0, "", 0)])#the lobby is never reaped
+	def test_disconnectName(self):
+		registry = PresenceRegistry()
+		registry.join("a", 0)
+		registry.setUser("a", "alice")
+		self.assertEqual(registry.leave("a"), {"user":"alice", "room":0})
+		self.assertIsNone(registry.leave("a"))
+		noticeBatcher.take()
+		for name in ("alice", None):
+			client = socketio.test_client(app)
+			client.emit("createRoom", {"name":"room"})
+			room = client.get_received()[-1]["args"][0]["room"]
+			if (name is not None):
+				client.emit("sendMetaMessage", {"user":name,"oldUser":"Unknown User"})
+			client.disconnect()
+			(noticeRoom, notices, dropped), = noticeBatcher.take()
+			self.assertEqual((noticeRoom, dropped), (room, 0))
+			self.assertEqual([(notice["user"], notice["disconnected"]) for notice in notices], [(name or "Unknown User", True)])
+
+class NoticeBatcherUnitTest(unittest.TestCase):
+	def test_simple(self):
+		batcher = NoticeBatcher(2)
+		self.assertEqual(batcher.take(), [])
+		for i in range(5):
+			batcher.add(1, {"user":str(i),"disconnected":True})
+		batcher.add(2, {"user":"a","disconnected":True})
+		self.assertEqual(sorted(batcher.take(), key=lambda batch: batch[0]), [
+			(1, [{"user":"0","disconnected":True}, {"user":"1","disconnected":True}], 3),
+			(2, [{"user":"a","disconnected":True}], 0),
+		])
+		self.assertEqual(batcher.take(), [])
+
 if __name__ == "__main__":
+	logger.info("async mode "+socketio.async_mode)
+	if (socketio.async_mode in ("eventlet", "gevent")):
+		raiseFileLimit()
+	if (WORKER == 0 and clientManager is not None):
+		startNativeThread(runBroker, clientManager.address, clientManager.authkey)
 	initDB()
-	socketio.run(app, host=HOST, port=PORT, debug=False)
+	socketio.start_background_task(noticeLoop)
+	options = {}
+	if (socketio.async_mode == "eventlet"):
+		options["max_size"] = MAXCONNECTIONS
+	elif (socketio.async_mode == "threading"):
+		options["allow_unsafe_werkzeug"] = True#chosen explicitly or nothing else is installed
+	try:
+		socketio.run(app, host=HOST, port=PORT, debug=False, **options)
+	finally:
+		getRoomStore().setRooms(WORKER, [])
+		getRoomStore().close()
+		logListener.stop()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import json
+import time
+import socketio
+
+#opens idle websocket connections to a running server and reports how many of them it holds, e.g.
+#EDOC_ASYNC_MODE=eventlet EDOC_HOST=127.0.0.1 python3 edoc.py
+#python3 loadtest.py -u http://127.0.0.1:62155 -c 10000 -r 100
+#a rate the box cannot keep up with lets the pings of the held connections time out,
+#gevent keeps two file descriptors per connection, eventlet one
+
+async def connect(url, clients, errors):
+	client = socketio.AsyncClient(reconnection=False)
+	try:
+		await client.connect(url, transports=["websocket"])
+		clients.append(client)
+	except (socketio.exceptions.ConnectionError, OSError) as e:
+		errors.append(str(e))
+
+async def run(url, connections, rate, hold):
+	clients = []
+	errors = []
+	start = time.monotonic()
+	tasks = []
+	for i in range(connections):
+		tasks.append(asyncio.ensure_future(connect(url, clients, errors)))
+		await asyncio.sleep(1/rate)
+	await asyncio.gather(*tasks)
+	connectTime = time.monotonic()-start
+	await asyncio.sleep(hold)
+	held = sum(1 for client in clients if client.connected)
+	await asyncio.gather(*[client.disconnect() for client in clients])
+	return {
+		"connections":connections,
+		"connected":len(clients),
+		"held":held,
+		"failed":len(errors),
+		"errors":sorted(set(errors))[:10],
+		"connectSeconds":round(connectTime, 3),
+		"holdSeconds":hold,
+	}
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Measures how many idle connections an edoc server holds.")
+	parser.add_argument("-u", "--url", default="http://127.0.0.1:62155", help="Specify url of the server.")
+	parser.add_argument("-c", "--connections", type=int, default=1000, help="Specify number of connections.")
+	parser.add_argument("-r", "--rate", type=float, default=500, help="Specify number of connections opened per second.")
+	parser.add_argument("--hold", type=float, default=60, metavar="seconds", help="Specify how long the connections stay idle.")
+	args = vars(parser.parse_args())
+	try:
+		import resource
+		soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+		resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+	except (ImportError, ValueError, OSError):
+		pass
+	print(json.dumps(asyncio.run(run(args["url"], args["connections"], args["rate"], args["hold"])), indent="\t"))